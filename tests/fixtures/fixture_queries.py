@@ -0,0 +1,27 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+
+from tests.utils import QueryLog
+
+
+@pytest.fixture
+def query_log():
+    """Record queries of a block with the template line that ran them."""
+    def capture(func):
+        cache.clear()
+        log = QueryLog()
+        with connection.execute_wrapper(log):
+            func()
+        return log
+    return capture
+
+
+@pytest.fixture
+def authors(mixer):
+    """Return a function creating `count` users with a group each."""
+    def create(count):
+        users = mixer.cycle(count).blend('auth.User')
+        groups = mixer.cycle(count).blend('posts.Group')
+        return list(zip(users, groups))
+    return create
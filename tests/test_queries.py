@@ -0,0 +1,209 @@
+import pytest
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+from tests.utils import extra_queries_report
+
+SIZES = (1, 10, 100)
+
+
+def add_posts(authors, count, **fields):
+    """Add `count` posts, each by a new author in a new group."""
+    for author, group in authors(count):
+        values = {'author': author, 'group': group, **fields}
+        Post.objects.create(text=f'Пост для поиска {author.username}', **values)
+
+
+def read(response):
+    """Read a streaming response to the end, running its queries."""
+    return b''.join(response.streaming_content)
+
+
+def add_comments(authors, post, count):
+    for author, _ in authors(count):
+        Comment.objects.create(post=post, author=author, text='Комментарий')
+
+
+def add_followed_posts(authors, user, count):
+    for author, group in authors(count):
+        Follow.objects.create(user=user, author=author)
+        Post.objects.create(text='Пост', author=author, group=group)
+
+
+class TestQueryCount:
+    """
+    Every view must run the same number of queries whatever the number
+    of posts, comments, authors or groups it shows.
+    """
+
+    def assert_constant(self, query_log, grow, request):
+        logs = {}
+        total = 0
+        for size in SIZES:
+            grow(size - total)
+            total = size
+            logs[size] = query_log(request)
+        counts = {len(log) for log in logs.values()}
+        assert len(counts) == 1, extra_queries_report(logs)
+
+    @pytest.mark.django_db
+    def test_index(self, user_client, authors, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count),
+            lambda: user_client.get(reverse('posts:index')),
+        )
+
+    @pytest.mark.django_db
+    def test_index_more(self, user_client, authors, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count),
+            lambda: user_client.get(reverse('posts:index_more')),
+        )
+
+    @pytest.mark.django_db
+    def test_index_feed(self, user_client, authors, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count),
+            lambda: read(user_client.get(reverse('posts:index_feed'))),
+        )
+
+    @pytest.mark.django_db
+    def test_group_list(self, user_client, authors, group, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count, group=group),
+            lambda: user_client.get(
+                reverse('posts:group_list', args=(group.slug,))
+            ),
+        )
+
+    @pytest.mark.django_db
+    def test_group_more(self, user_client, authors, group, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count, group=group),
+            lambda: user_client.get(
+                reverse('posts:group_more', args=(group.slug,))
+            ),
+        )
+
+    @pytest.mark.django_db
+    def test_group_feed(self, user_client, authors, group, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count, group=group),
+            lambda: read(
+                user_client.get(
+                    reverse('posts:group_feed', args=(group.slug,))
+                )
+            ),
+        )
+
+    @pytest.mark.django_db
+    def test_profile(self, user, user_client, authors, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count, author=user),
+            lambda: user_client.get(
+                reverse('posts:profile', args=(user.username,))
+            ),
+        )
+
+    @pytest.mark.django_db
+    def test_profile_more(self, user, user_client, authors, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count, author=user),
+            lambda: user_client.get(
+                reverse('posts:profile_more', args=(user.username,))
+            ),
+        )
+
+    @pytest.mark.django_db
+    def test_profile_feed(self, user, user_client, authors, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count, author=user),
+            lambda: read(
+                user_client.get(
+                    reverse('posts:profile_feed', args=(user.username,))
+                )
+            ),
+        )
+
+    @pytest.mark.django_db
+    def test_post_detail(self, user_client, authors, post, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_comments(authors, post, count),
+            lambda: user_client.get(
+                reverse('posts:post_detail', args=(post.id,))
+            ),
+        )
+
+    @pytest.mark.django_db
+    def test_add_comment(self, user_client, authors, post, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_comments(authors, post, count),
+            lambda: user_client.post(
+                reverse('posts:add_comment', args=(post.id,)),
+                {'text': 'Ещё комментарий'},
+            ),
+        )
+
+    @pytest.mark.django_db
+    def test_follow_index(self, user, user_client, authors, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_followed_posts(authors, user, count),
+            lambda: user_client.get(reverse('posts:follow_index')),
+        )
+
+    @pytest.mark.django_db
+    def test_follow_more(self, user, user_client, authors, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_followed_posts(authors, user, count),
+            lambda: user_client.get(reverse('posts:follow_more')),
+        )
+
+    @pytest.mark.django_db
+    def test_follow_and_unfollow(self, user, user_client, another_user,
+                                 authors, query_log):
+        def follow_and_unfollow():
+            user_client.get(
+                reverse('posts:profile_follow', args=(another_user.username,))
+            )
+            user_client.get(
+                reverse(
+                    'posts:profile_unfollow', args=(another_user.username,)
+                )
+            )
+
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count, author=another_user),
+            follow_and_unfollow,
+        )
+
+    @pytest.mark.django_db
+    def test_search(self, user_client, authors, query_log):
+        self.assert_constant(
+            query_log,
+            lambda count: add_posts(authors, count),
+            lambda: user_client.get(reverse('posts:search'), {'q': 'поиск'}),
+        )
+
+    @pytest.mark.django_db
+    def test_post_forms(self, user_client, authors, post, query_log):
+        def open_forms():
+            user_client.get(reverse('posts:create_post'))
+            user_client.get(reverse('posts:update_post', args=(post.id,)))
+
+        self.assert_constant(
+            query_log, lambda count: authors(count), open_forms
+        )
@@ -1,5 +1,94 @@
+import os
+import sys
+from collections import Counter
+
+from django.template.base import Node, TokenType
+
+PROJECT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'yatube'
+)
+
+
 def get_field_from_context(context, field_type):
     for field in context.keys():
         if field not in ('user', 'request') and isinstance(context[field], field_type):
             return context[field]
     return
+
+
+def template_line(frame):
+    """`template:line {{ tag }}` of a node rendering in frame, if any."""
+    if frame.f_code.co_name != 'render_annotated':
+        return None
+    node = frame.f_locals.get('self')
+    if not isinstance(node, Node) or node.token is None:
+        return None
+    token = node.token
+    if token.token_type == TokenType.VAR:
+        code = f'{{{{ {token.contents} }}}}'
+    else:
+        code = f'{{% {token.contents} %}}'
+    return f'{node.origin.template_name}:{token.lineno} {code}'
+
+
+def code_line(frame):
+    """`file:line in function` of frame if it is project code."""
+    filename = frame.f_code.co_filename
+    if not filename.startswith(PROJECT_DIR):
+        return None
+    path = os.path.relpath(filename, PROJECT_DIR)
+    return f'{path}:{frame.f_lineno} in {frame.f_code.co_name}()'
+
+
+def query_origin(frame):
+    """
+    Innermost template node rendering when the query ran, or the
+    innermost project code line for queries made outside templates.
+    """
+    first_code_line = None
+    while frame is not None:
+        line = template_line(frame)
+        if line is not None:
+            return line
+        if first_code_line is None:
+            first_code_line = code_line(frame)
+        frame = frame.f_back
+    return first_code_line or '<unknown>'
+
+
+class QueryLog:
+    """Execute wrapper remembering every query and where it came from."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((query_origin(sys._getframe(1)), sql))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def origins(self):
+        return Counter(origin for origin, _ in self.queries)
+
+
+def extra_queries_report(logs):
+    """
+    Describe queries whose number grows with the data: the code or
+    template line that ran them and an example of the SQL.
+    """
+    sizes = sorted(logs)
+    smallest, largest = logs[sizes[0]], logs[sizes[-1]]
+    lines = [
+        'Query count depends on the number of rows: '
+        + ', '.join(f'{size} rows: {len(logs[size])}' for size in sizes)
+    ]
+    baseline = smallest.origins()
+    for origin, count in largest.origins().items():
+        extra = count - baseline.get(origin, 0)
+        if extra <= 0:
+            continue
+        sql = next(sql for where, sql in largest.queries if where == origin)
+        lines.append(f'  {origin}: {extra} extra queries, e.g. {sql[:200]}')
+    return '\n'.join(lines)
@@ -0,0 +1,159 @@
+"""
+Compact JSON representations with sparse fieldsets.
+
+A serializer maps each field of the representation to a function of the
+object and to the model fields the function reads. ?fields=id,text picks
+some of them; the queryset then loads only those columns and joins only
+the tables they come from.
+"""
+from django.contrib.auth import get_user_model
+
+from posts.models import Comment, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def date(value):
+    return value.isoformat()
+
+
+def stat(name):
+    def get(user):
+        try:
+            return getattr(user.stats, name)
+        except UserStats.DoesNotExist:
+            return 0
+
+    return get
+
+
+class Serializer:
+    model = None
+    # name: (function of the object, model fields it reads)
+    fields = {}
+    # Model fields always loaded, e.g. the pagination keyset.
+    always = ("id",)
+
+    def __init__(self, names=None):
+        if names is None:
+            names = list(self.fields)
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise FieldsError(f"Unknown fields: {', '.join(unknown)}")
+        self.names = names
+
+    @classmethod
+    def from_request(cls, request):
+        raw = request.GET.get("fields")
+        if raw is None:
+            return cls()
+        return cls([name for name in raw.split(",") if name])
+
+    def prepare(self, queryset, prefix="", keyset=()):
+        """
+        Restrict queryset to the columns of the selected fields. prefix
+        is the path to the serialized objects, e.g. "post__" for
+        timeline entries, whose own keyset columns are kept as well so
+        the cursor does not load them one row at a time.
+        """
+        columns = set(self.always)
+        for name in self.names:
+            columns.update(self.fields[name][1])
+        columns = {prefix + column for column in columns}
+        columns.update(keyset)
+        joins = {
+            column.rsplit("__", 1)[0] for column in columns if "__" in column
+        }
+        return queryset.select_related(None).select_related(*joins).only(
+            *columns
+        )
+
+    def dump(self, obj):
+        return {name: self.fields[name][0](obj) for name in self.names}
+
+
+class PostSerializer(Serializer):
+    model = Post
+    always = ("id", "pub_date")
+    fields = {
+        "id": (lambda post: post.pk, ()),
+        "text": (lambda post: post.text, ("text",)),
+        "pub_date": (lambda post: date(post.pub_date), ()),
+        "author": (lambda post: post.author.username, ("author__username",)),
+        "group": (
+            lambda post: post.group.slug if post.group_id else None,
+            ("group__slug",),
+        ),
+        "image": (
+            lambda post: post.image.url if post.image else None,
+            ("image",),
+        ),
+    }
+
+
+class PostDetailSerializer(PostSerializer):
+    fields = dict(
+        PostSerializer.fields,
+        comments_count=(
+            lambda post: post.comments_count,
+            ("comments_count",),
+        ),
+    )
+
+
+class CommentSerializer(Serializer):
+    model = Comment
+    always = ("id", "created")
+    fields = {
+        "id": (lambda comment: comment.pk, ()),
+        "author": (
+            lambda comment: comment.author.username,
+            ("author__username",),
+        ),
+        "text": (lambda comment: comment.text, ("text",)),
+        "created": (lambda comment: date(comment.created), ()),
+    }
+
+
+class GroupSerializer(Serializer):
+    model = Group
+    always = ("id",)
+    fields = {
+        "id": (lambda group: group.pk, ()),
+        "slug": (lambda group: group.slug, ("slug",)),
+        "title": (lambda group: group.title, ("title",)),
+        "description": (lambda group: group.description, ("description",)),
+        "posts_count": (
+            lambda group: group.posts_count,
+            ("posts_count",),
+        ),
+    }
+
+
+class ProfileSerializer(Serializer):
+    model = User
+    always = ("id", "date_joined")
+    fields = {
+        "id": (lambda user: user.pk, ()),
+        "username": (lambda user: user.username, ("username",)),
+        "full_name": (
+            lambda user: user.get_full_name(),
+            ("first_name", "last_name"),
+        ),
+        "posts_count": (
+            stat("posts_count"),
+            ("stats__posts_count",),
+        ),
+        "followers_count": (
+            stat("followers_count"),
+            ("stats__followers_count",),
+        ),
+        "following_count": (
+            stat("following_count"),
+            ("stats__following_count",),
+        ),
+    }
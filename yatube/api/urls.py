@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import views
+
+app_name = "api"
+
+urlpatterns = [
+    path("posts/", views.posts, name="posts"),
+    path("posts/<int:post_id>/", views.post, name="post"),
+    path("posts/<int:post_id>/comments/", views.comments, name="comments"),
+    path("groups/", views.groups, name="groups"),
+    path("groups/<slug:slug>/", views.group, name="group"),
+    path("profiles/", views.profiles, name="profiles"),
+    path("profiles/<str:username>/", views.profile, name="profile"),
+    path("follow/", views.follow, name="follow"),
+]
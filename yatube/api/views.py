@@ -0,0 +1,267 @@
+"""
+Read API for the mobile clients.
+
+Lists are paginated by cursor (?cursor=, ?limit=) or fetched in bulk
+(?ids=1,2,3), every endpoint takes ?fields= (see serializers). ETags come
+from the same cache versions as the HTML pages, so unchanged resources
+are answered with 304 before any query runs.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import (
+    condition,
+    conditional_page,
+    require_safe,
+)
+
+from core.paginator import CursorPaginator
+from core.routers import replica_reads
+from posts import timeline
+from posts.etags import make_etag
+from posts.models import Comment, Group, Post
+from posts.signals import (
+    FEED_NAMESPACE,
+    author_namespace,
+    post_namespace,
+)
+
+from .serializers import (
+    CommentSerializer,
+    GroupSerializer,
+    PostDetailSerializer,
+    PostSerializer,
+    ProfileSerializer,
+)
+
+User = get_user_model()
+
+POSTS_KEYSET = ("pub_date", "id")
+COMMENTS_KEYSET = ("created", "id")
+# Counters change between pages, a cursor over them skips or repeats
+# groups.
+GROUPS_KEYSET = ("id",)
+PROFILES_KEYSET = ("date_joined", "id")
+
+
+class CountPaginator(CursorPaginator):
+    """Cursor paginator over an integer key, largest first."""
+
+    dump_key = staticmethod(str)
+    load_key = staticmethod(int)
+
+
+def api_response(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+    )
+
+
+def error(message, status=400):
+    return api_response({"detail": message}, status)
+
+
+def parse_ids(request):
+    raw = request.GET.get("ids")
+    if raw is None:
+        return None
+    try:
+        ids = [int(value) for value in raw.split(",") if value]
+    except ValueError:
+        raise ValueError("ids must be a comma separated list of numbers")
+    if len(ids) > settings.API_MAX_LIMIT:
+        raise ValueError(f"At most {settings.API_MAX_LIMIT} ids")
+    return ids
+
+
+def parse_limit(request):
+    raw = request.GET.get("limit")
+    if raw is None:
+        return settings.PAGINATION_LIMIT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError("limit must be a number")
+    return max(1, min(limit, settings.API_MAX_LIMIT))
+
+
+def listing(
+    request,
+    queryset,
+    serializer_class,
+    keyset,
+    paginator_class=CursorPaginator,
+    prefix="",
+    transform=None,
+):
+    """A page of queryset, or the objects requested by ?ids=."""
+    try:
+        serializer = serializer_class.from_request(request)
+        ids = parse_ids(request)
+        limit = parse_limit(request)
+    except ValueError as exc:
+        return error(str(exc))
+    queryset = serializer.prepare(queryset, prefix, keyset)
+    if ids is not None:
+        objects = list(queryset.filter(**{f"{prefix}pk__in": ids}))
+        if transform is not None:
+            objects = transform(objects)
+        found = {obj.pk: obj for obj in objects}
+        return api_response(
+            {
+                "results": [
+                    serializer.dump(found[pk]) for pk in ids if pk in found
+                ]
+            }
+        )
+    paginator = paginator_class(
+        queryset, limit, keyset=keyset, transform=transform
+    )
+    page = paginator.get_page(request.GET.get("cursor"))
+    return api_response(
+        {
+            "results": [serializer.dump(obj) for obj in page],
+            "next": paginator.next_cursor,
+            "previous": paginator.previous_cursor,
+        }
+    )
+
+
+def versioned(*namespaces):
+    """ETag function built from the versions of fixed namespaces."""
+
+    def etag(request, **kwargs):
+        return make_etag(request, *namespaces)
+
+    return etag
+
+
+def post_etag(request, post_id):
+    return make_etag(request, post_namespace(post_id))
+
+
+def profile_etag(request, username):
+    return make_etag(request, author_namespace(username))
+
+
+@replica_reads
+@require_safe
+@condition(etag_func=versioned(FEED_NAMESPACE))
+def posts(request):
+    """Newest posts, of one ?group= or ?author= if given."""
+    queryset = Post.objects.all()
+    if "group" in request.GET:
+        queryset = queryset.filter(group__slug=request.GET["group"])
+    if "author" in request.GET:
+        queryset = queryset.filter(author__username=request.GET["author"])
+    return listing(request, queryset, PostSerializer, POSTS_KEYSET)
+
+
+@replica_reads
+@require_safe
+@condition(etag_func=post_etag)
+def post(request, post_id):
+    """A post with the first page of its comments."""
+    try:
+        serializer = PostDetailSerializer.from_request(request)
+    except ValueError as exc:
+        return error(str(exc))
+    comments = CommentSerializer()
+    post = get_object_or_404(serializer.prepare(Post.objects), pk=post_id)
+    paginator = CursorPaginator(
+        comments.prepare(Comment.objects.filter(post_id=post.pk)),
+        settings.PAGINATION_LIMIT,
+        keyset=COMMENTS_KEYSET,
+    )
+    page = paginator.get_page()
+    return api_response(
+        dict(
+            serializer.dump(post),
+            comments={
+                "results": [comments.dump(comment) for comment in page],
+                "next": paginator.next_cursor,
+            },
+        )
+    )
+
+
+@replica_reads
+@require_safe
+@condition(etag_func=post_etag)
+def comments(request, post_id):
+    get_object_or_404(Post.objects.only("id"), pk=post_id)
+    return listing(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        CommentSerializer,
+        COMMENTS_KEYSET,
+    )
+
+
+@replica_reads
+@require_safe
+@condition(etag_func=versioned(FEED_NAMESPACE))
+def groups(request):
+    """Groups, newest first."""
+    return listing(
+        request,
+        Group.objects.all(),
+        GroupSerializer,
+        GROUPS_KEYSET,
+        paginator_class=CountPaginator,
+    )
+
+
+@replica_reads
+@require_safe
+@condition(etag_func=versioned(FEED_NAMESPACE))
+def group(request, slug):
+    try:
+        serializer = GroupSerializer.from_request(request)
+    except ValueError as exc:
+        return error(str(exc))
+    group = get_object_or_404(serializer.prepare(Group.objects), slug=slug)
+    return api_response(serializer.dump(group))
+
+
+@replica_reads
+@require_safe
+@conditional_page
+def profiles(request):
+    """Users, newest first. Counters change too often to version."""
+    return listing(
+        request, User.objects.all(), ProfileSerializer, PROFILES_KEYSET
+    )
+
+
+@replica_reads
+@require_safe
+@condition(etag_func=profile_etag)
+def profile(request, username):
+    try:
+        serializer = ProfileSerializer.from_request(request)
+    except ValueError as exc:
+        return error(str(exc))
+    user = get_object_or_404(
+        serializer.prepare(User.objects), username=username
+    )
+    return api_response(serializer.dump(user))
+
+
+@require_safe
+@conditional_page
+def follow(request):
+    """The follow feed of the logged in user."""
+    if not request.user.is_authenticated:
+        return error("Authentication required", 401)
+    return listing(
+        request,
+        timeline.feed(request.user),
+        PostSerializer,
+        timeline.KEYSET,
+        prefix="post__",
+        transform=timeline.posts_of,
+    )
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'run_at', 'created',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'key')
+    readonly_fields = ('created',)
+    # Arguments may hold secrets, e.g. a password reset link.
+    exclude = ('payload',)
+
+
+admin.site.register(Task, TaskAdmin)
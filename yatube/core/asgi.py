@@ -0,0 +1,238 @@
+"""
+ASGI serving for Django 2.2, which has no ASGI support of its own.
+
+ASGIHandler wraps the WSGI handler. Everything that waits on the client
+runs on the event loop: reading the request body, which is spooled to
+disk past FILE_UPLOAD_MAX_MEMORY_SIZE, and sending the response, which
+follows the client's pace. Only the Django part of a request, the views
+with their ORM queries and template rendering, runs in a thread pool of
+ASGI_THREADS threads. A slow client or a feed reader waiting on its
+response therefore holds a socket, not a worker or a thread, and the
+number of requests querying the database at once stays bounded however
+many connections are open. Responses waiting for content of their own,
+the server-sent events of core.events, are iterated on the loop too.
+
+Views are ordinary synchronous Django views: 2.2 cannot run coroutines
+as views, so the bridge moves the blocking part of each request off the
+loop instead.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+
+# Bytes of a streamed response produced per pool job.
+CHUNK_SIZE = 64 * 1024
+
+
+def wsgi_environ(scope, body):
+    """The WSGI environ of the ASGI http scope with the spooled body."""
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    path = scope["path"].encode("utf-8").decode("latin-1")
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": path,
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server_name),
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        if name in environ:
+            # HTTP/2 sends each cookie as a header of its own.
+            separator = "; " if name == "HTTP_COOKIE" else ","
+            value = f"{environ[name]}{separator}{value}"
+        environ[name] = value
+    return environ
+
+
+class Response:
+    """Status and headers captured by start_response."""
+
+    status = None
+    headers = ()
+
+    def start_response(self, status, headers, exc_info=None):
+        self.status = int(status.split(" ", 1)[0])
+        self.headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers
+        ]
+
+
+class ASGIHandler:
+    def __init__(self, wsgi_application, threads=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or settings.ASGI_THREADS,
+            thread_name_prefix="asgi",
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported scope type {scope['type']}")
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def read_body(self, receive):
+        """Spool the request body, or return None if the client left."""
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                return None
+            body.write(message.get("body", b""))
+            if not message.get("more_body", False):
+                body.seek(0)
+                return body
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        try:
+            status, headers, result = await self.run(
+                self.respond, wsgi_environ(scope, body)
+            )
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": status,
+                    "headers": headers,
+                }
+            )
+            if isinstance(result, bytes):
+                await send({"type": "http.response.body", "body": result})
+            elif hasattr(result, "__aiter__"):
+                await self.stream_async(result, receive, send)
+            else:
+                await self.stream(result, send)
+        finally:
+            body.close()
+
+    def respond(self, environ):
+        """
+        Run the request through Django. A response rendered in memory is
+        closed, firing request_finished, in the thread that handled it and
+        its body returned; a streaming one is returned to be iterated.
+        """
+        response = Response()
+        result = self.wsgi_application(environ, response.start_response)
+        if getattr(result, "streaming", False):
+            return response.status, response.headers, result
+        try:
+            return response.status, response.headers, result.content
+        finally:
+            result.close()
+
+    async def stream(self, result, send):
+        try:
+            chunks = iter(result)
+            while True:
+                chunk = await self.run(next_chunk, chunks)
+                if chunk is None:
+                    break
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": True,
+                    }
+                )
+            await send({"type": "http.response.body"})
+        finally:
+            await self.run(result.close)
+
+    async def stream_async(self, result, receive, send):
+        """
+        Send a response that waits for its content on the loop, e.g. a
+        core.events stream, until it ends or the client disconnects.
+        """
+        disconnected = asyncio.ensure_future(wait_disconnect(receive))
+        chunks = result.__aiter__()
+        chunk = None
+        try:
+            while True:
+                chunk = asyncio.ensure_future(chunks.__anext__())
+                await asyncio.wait(
+                    (chunk, disconnected),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not chunk.done():
+                    break
+                try:
+                    body = chunk.result()
+                except StopAsyncIteration:
+                    await send({"type": "http.response.body"})
+                    break
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": body,
+                        "more_body": True,
+                    }
+                )
+        finally:
+            disconnected.cancel()
+            if chunk is not None and not chunk.done():
+                chunk.cancel()
+                await asyncio.wait((chunk,))
+            await chunks.aclose()
+            await self.run(result.close)
+
+
+async def wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def next_chunk(chunks):
+    """Up to CHUNK_SIZE bytes of chunks, or None when it is exhausted."""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= CHUNK_SIZE:
+            break
+    return bytes(buffer) if buffer else None
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return ASGIHandler(WSGIHandler())
@@ -0,0 +1,57 @@
+"""
+Versioned cache namespaces.
+
+Cached entries embed the version of the namespaces they were built from.
+Model signals bump a namespace on every change, which makes all entries
+built from the old data unreachable at once: nothing is served stale and
+nothing has to be deleted key by key.
+
+The time of the last bump is kept too, once its transaction commits:
+entries built under the new version must not be read from a replica
+synced before it, see core.routers.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = "version"
+CHANGED_KEY = f"{KEY_PREFIX}:changed_at"
+
+
+def _key(namespace):
+    return f"{KEY_PREFIX}:{namespace}"
+
+
+def _initial():
+    # Starting from the clock keeps versions increasing even if a counter
+    # gets evicted and has to be recreated.
+    return time.time_ns()
+
+
+def get_version(namespace):
+    key = _key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(*namespaces):
+    for namespace in namespaces:
+        try:
+            cache.incr(_key(namespace))
+        except ValueError:
+            cache.set(_key(namespace), _initial(), None)
+    transaction.on_commit(note_change)
+
+
+def note_change():
+    cache.set(CHANGED_KEY, time.time(), None)
+
+
+def changed_at():
+    """Time of the last committed bump, now if it was evicted."""
+    cache.add(CHANGED_KEY, time.time(), None)
+    return cache.get(CHANGED_KEY)
@@ -0,0 +1,233 @@
+"""
+Cache backends.
+
+SQLiteCache keeps the cache in an SQLite database on the local disk, so
+every process of the machine (web workers and task workers alike) shares
+one cache and a version bumped by one of them is seen by all the others.
+The database runs in WAL mode: readers never wait for a writer, and
+writes are short IMMEDIATE transactions.
+
+Integers are stored as SQLite integers and everything else is pickled.
+incr reads and writes inside one transaction, so concurrent increments
+of a version counter are never lost. Once the cache holds more than
+MAX_ENTRIES keys the least recently used ones are culled; access times
+are only rewritten when older than ACCESS_RESOLUTION seconds, so reading
+a hot key does not turn into a write every time.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache ("
+    "key TEXT PRIMARY KEY, "
+    "value BLOB NOT NULL, "
+    "expires REAL, "
+    "accessed REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)",
+)
+NOT_EXPIRED = "(expires IS NULL OR expires > ?)"
+# Stay below SQLITE_MAX_VARIABLE_NUMBER of old SQLite builds.
+CHUNK_SIZE = 500
+INTEGER_RANGE = range(-(2 ** 63), 2 ** 63)
+
+
+def encode(value):
+    if type(value) is int and value in INTEGER_RANGE:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def decode(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+def chunks(items):
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+class SQLiteCache(BaseCache):
+    """
+    CACHES = {
+        "default": {
+            "BACKEND": "core.cache_backends.SQLiteCache",
+            "LOCATION": "/var/tmp/yatube-cache.sqlite3",
+        }
+    }
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = location
+        self._busy_timeout = options.get("BUSY_TIMEOUT", 5)
+        self._access_resolution = options.get("ACCESS_RESOLUTION", 60)
+        self._cull_every = options.get("CULL_EVERY", 100)
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            # A forked worker must not share its parent's connection.
+            local.connection = self._connect()
+            local.pid = os.getpid()
+        return local.connection
+
+    def _connect(self):
+        db = sqlite3.connect(
+            self._path, timeout=self._busy_timeout, isolation_level=None
+        )
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            db.execute(statement)
+        return db
+
+    @contextmanager
+    def _write(self, count=1):
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+            self._writes += count
+            if self._writes >= self._cull_every:
+                self._writes = 0
+                self._cull(db)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _cull(self, db):
+        now = time.time()
+        db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        count = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            db.execute("DELETE FROM cache")
+            return
+        db.execute(
+            "DELETE FROM cache WHERE key IN "
+            "(SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+            (count // self._cull_frequency,),
+        )
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        made = {self._key(key, version): key for key in keys}
+        now = time.time()
+        rows = []
+        for chunk in chunks(list(made)):
+            rows += self._db.execute(
+                "SELECT key, value, accessed FROM cache "
+                f"WHERE key IN ({', '.join('?' * len(chunk))}) "
+                f"AND {NOT_EXPIRED}",
+                (*chunk, now),
+            ).fetchall()
+        stale = [
+            (now, key)
+            for key, _, accessed in rows
+            if accessed < now - self._access_resolution
+        ]
+        if stale:
+            with self._write(0) as db:
+                db.executemany(
+                    "UPDATE cache SET accessed = ? WHERE key = ?", stale
+                )
+        return {made[key]: decode(value) for key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = [
+            (self._key(key, version), encode(value), expires, now)
+            for key, value in data.items()
+        ]
+        with self._write(len(rows)) as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            cursor = db.execute(
+                "INSERT INTO cache (key, value, expires, accessed) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+                "expires = excluded.expires, accessed = excluded.accessed "
+                "WHERE cache.expires <= excluded.accessed",
+                (key, encode(value), self.get_backend_timeout(timeout), now),
+            )
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._write() as db:
+            cursor = db.execute(
+                "UPDATE cache SET expires = ? "
+                f"WHERE key = ? AND {NOT_EXPIRED}",
+                (self.get_backend_timeout(timeout), key, time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        made_key = self._key(key, version)
+        with self._write() as db:
+            row = db.execute(
+                f"SELECT value FROM cache WHERE key = ? AND {NOT_EXPIRED}",
+                (made_key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = decode(row[0]) + delta
+            db.execute(
+                "UPDATE cache SET value = ? WHERE key = ?",
+                (encode(value), made_key),
+            )
+        return value
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._db.execute(
+            f"SELECT 1 FROM cache WHERE key = ? AND {NOT_EXPIRED}",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [(self._key(key, version),) for key in keys]
+        with self._write(0) as db:
+            db.executemany("DELETE FROM cache WHERE key = ?", keys)
+
+    def clear(self):
+        with self._write(0) as db:
+            db.execute("DELETE FROM cache")
@@ -0,0 +1,78 @@
+"""
+Server-sent events.
+
+EventStreamResponse forwards the messages of a core.pubsub subscription
+to the client as they are published. Served by core.asgi, the stream
+waits on the event loop and holds no thread. Served over WSGI it holds
+a worker thread, so it ends after EVENT_STREAM_TIMEOUT seconds and the
+browser's EventSource reconnects by itself, sending the id of the last
+event it got in the Last-Event-ID header.
+"""
+import asyncio
+import queue
+import time
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+# A comment line, ignored by EventSource. It keeps proxies from timing
+# the connection out and finds out when the client is gone.
+HEARTBEAT = b": ping\n\n"
+
+
+def format_event(data, event=None, id=None):
+    """Encode one event, data is text and may span several lines."""
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def last_event_id(request):
+    return request.META.get("HTTP_LAST_EVENT_ID", "")
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    def __init__(self, subscription, backlog=()):
+        """
+        Stream the already encoded events of backlog, then the messages
+        of subscription, which the response closes when it is closed.
+        """
+        self.subscription = subscription
+        self.backlog = list(backlog)
+        super().__init__(self.events(), content_type="text/event-stream")
+        self["Cache-Control"] = "no-cache"
+        # Not buffered by nginx.
+        self["X-Accel-Buffering"] = "no"
+
+    def events(self):
+        yield from self.backlog
+        heartbeat = settings.EVENT_STREAM_HEARTBEAT
+        deadline = time.monotonic() + settings.EVENT_STREAM_TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                yield self.subscription.get(min(heartbeat, remaining))
+            except queue.Empty:
+                yield HEARTBEAT
+
+    async def __aiter__(self):
+        """The events without an end, read by core.asgi on the loop."""
+        for event in self.backlog:
+            yield event
+        while True:
+            try:
+                yield await self.subscription.wait(
+                    settings.EVENT_STREAM_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+
+    def close(self):
+        self.subscription.close()
+        super().close()
@@ -0,0 +1,166 @@
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.benchmark import environment, summarize, write_report
+from core.cache_backends import SQLiteCache
+
+BACKENDS = ("locmem", "filebased", "sqlite")
+MANY = 10
+
+
+def create(backend, directory, max_entries):
+    params = {"OPTIONS": {"MAX_ENTRIES": max_entries}}
+    if backend == "locmem":
+        return LocMemCache(f"bench-{os.getpid()}", params)
+    if backend == "filebased":
+        return FileBasedCache(os.path.join(directory, "files"), params)
+    return SQLiteCache(os.path.join(directory, "cache.sqlite3"), params)
+
+
+def measure(operation, count):
+    latencies = []
+    start = time.perf_counter()
+    for number in range(count):
+        began = time.perf_counter()
+        operation(number)
+        latencies.append(time.perf_counter() - began)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def operations(cache, rng, keys, value):
+    """Single operations timed one by one, keyed by name."""
+    cache.set("counter", 0)
+
+    def get_many(number):
+        cache.get_many(rng.sample(keys, MANY))
+
+    def set_many(number):
+        cache.set_many({key: value for key in rng.sample(keys, MANY)})
+
+    return {
+        "get": lambda number: cache.get(rng.choice(keys)),
+        "set": lambda number: cache.set(rng.choice(keys), value),
+        f"get_many_{MANY}": get_many,
+        f"set_many_{MANY}": set_many,
+        "incr": lambda number: cache.incr("counter"),
+    }
+
+
+def cache_aside(backend, directory, options, seed, results):
+    """
+    A worker reading through the cache: misses are "computed" and set,
+    so the hit ratio shows how much the workers share.
+    """
+    cache = create(backend, directory, options["keys"] * 2)
+    rng = random.Random(seed)
+    keys = [f"key:{number}" for number in range(options["keys"])]
+    value = os.urandom(options["value_size"])
+    hits = 0
+    start = time.perf_counter()
+    for _ in range(options["operations"]):
+        key = rng.choice(keys)
+        if cache.get(key) is None:
+            cache.set(key, value)
+        else:
+            hits += 1
+    results.put((hits, time.perf_counter() - start))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the cache backends: latency of single operations and "
+        "throughput and hit ratio of processes sharing the cache"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--operations", type=int, default=10000)
+        parser.add_argument("--keys", type=int, default=1000)
+        parser.add_argument(
+            "--value-size",
+            type=int,
+            default=2000,
+            help="Bytes per cached value, about one rendered post card",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=4,
+            help="Worker processes of the shared cache-aside workload",
+        )
+        parser.add_argument(
+            "--backend", action="append", choices=BACKENDS, dest="backends"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report here")
+
+    def handle(self, *args, **options):
+        backends = options["backends"] or BACKENDS
+        report = {
+            "benchmark": "cache",
+            "environment": environment(),
+            "options": {
+                name: options[name]
+                for name in ("operations", "keys", "value_size", "processes")
+            },
+            "backends": {},
+        }
+        for backend in backends:
+            directory = tempfile.mkdtemp(prefix="bench-cache-")
+            try:
+                report["backends"][backend] = {
+                    "operations": self.single(backend, directory, options),
+                    "shared": self.shared(backend, directory, options),
+                }
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        write_report(report, options["output"], self.stdout)
+
+    def single(self, backend, directory, options):
+        cache = create(backend, directory, options["keys"] * 2)
+        rng = random.Random(options["seed"])
+        keys = [f"key:{number}" for number in range(options["keys"])]
+        value = os.urandom(options["value_size"])
+        cache.set_many({key: value for key in keys})
+        return {
+            name: measure(operation, options["operations"])
+            for name, operation in operations(
+                cache, rng, keys, value
+            ).items()
+        }
+
+    def shared(self, backend, directory, options):
+        create(backend, directory, options["keys"] * 2).clear()
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        workers = [
+            context.Process(
+                target=cache_aside,
+                args=(
+                    backend,
+                    directory,
+                    options,
+                    options["seed"] + number,
+                    results,
+                ),
+            )
+            for number in range(options["processes"])
+        ]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        total = options["operations"] * len(workers)
+        elapsed = max(seconds for _, seconds in outcomes)
+        return {
+            "throughput": round(total / elapsed, 2),
+            "hit_ratio": round(sum(hits for hits, _ in outcomes) / total, 4),
+        }
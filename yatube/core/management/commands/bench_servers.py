@@ -0,0 +1,178 @@
+import asyncio
+import time
+import urllib.parse
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import environment, summarize, write_report
+
+
+def address(url):
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme != "http" or not parts.hostname:
+        raise CommandError(f"Expected an http:// URL, got {url}")
+    return parts.hostname, parts.port or 80
+
+
+def request_head(host, path):
+    return (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Connection: close\r\n"
+    ).encode("latin-1")
+
+
+async def fetch(host, port, path):
+    """Status of one GET on a fresh connection, read to the end."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request_head(host, path) + b"\r\n")
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    return int(status_line.split()[1]) if status_line else 599
+
+
+async def trickle(host, port, path, interval, stop):
+    """
+    A slow client: send the request a byte every interval seconds and
+    read the response as slowly, holding the connection until stop.
+    """
+    while not stop.is_set():
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(interval)
+            continue
+        try:
+            for byte in request_head(host, path) + b"\r\n":
+                if stop.is_set():
+                    return
+                writer.write(bytes((byte,)))
+                await writer.drain()
+                await asyncio.sleep(interval)
+            while not stop.is_set() and await reader.read(1):
+                await asyncio.sleep(interval)
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of fast requests to a WSGI and an ASGI "
+        "server while many slow clients hold connections to them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--wsgi", help="Base URL of the WSGI server, e.g. gunicorn"
+        )
+        parser.add_argument(
+            "--asgi", help="Base URL of the ASGI server, e.g. uvicorn"
+        )
+        parser.add_argument(
+            "--path", default="/", help="Page the fast clients request"
+        )
+        parser.add_argument(
+            "--slow",
+            type=int,
+            default=200,
+            help="Slow clients holding connections open",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.5,
+            help="Seconds between the bytes a slow client sends or reads",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Fast clients requesting --path in a loop",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Seconds per server"
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=10,
+            help="Seconds after which a fast request counts as an error",
+        )
+        parser.add_argument("--output", help="Write the JSON report here")
+
+    def handle(self, *args, **options):
+        servers = {
+            kind: options[kind]
+            for kind in ("wsgi", "asgi")
+            if options[kind] is not None
+        }
+        if not servers:
+            raise CommandError("Give the URL of --wsgi, --asgi or both")
+        report = {
+            "benchmark": "servers",
+            "environment": environment(),
+            "options": {
+                name: options[name]
+                for name in (
+                    "path",
+                    "slow",
+                    "interval",
+                    "concurrency",
+                    "duration",
+                    "timeout",
+                )
+            },
+            "servers": {
+                kind: dict(
+                    url=url, **asyncio.run(self.measure(url, options))
+                )
+                for kind, url in servers.items()
+            },
+        }
+        write_report(report, options["output"], self.stdout)
+
+    async def measure(self, url, options):
+        host, port = address(url)
+        path = urllib.parse.urlsplit(url).path.rstrip("/") + options["path"]
+        stop = asyncio.Event()
+        slow = [
+            asyncio.create_task(
+                trickle(host, port, path, options["interval"], stop)
+            )
+            for _ in range(options["slow"])
+        ]
+        # Let the slow clients connect before measuring.
+        await asyncio.sleep(options["interval"] * 2)
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + options["duration"]
+
+        async def client():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(
+                        fetch(host, port, path), options["timeout"]
+                    )
+                except (OSError, asyncio.TimeoutError):
+                    status = 599
+                if status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(client() for _ in range(options["concurrency"]))
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*slow, return_exceptions=True)
+        return summarize(latencies, elapsed, errors)
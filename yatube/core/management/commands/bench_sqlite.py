@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.benchmark import environment, summarize, write_report
+from core.sqlite import pragma_statements
+
+SCHEMA = (
+    "CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT, pub_date REAL)",
+    "CREATE TABLE comment (id INTEGER PRIMARY KEY, post_id INTEGER, "
+    "text TEXT, created REAL)",
+    "CREATE INDEX post_feed ON post (pub_date)",
+    "CREATE INDEX comment_post ON comment (post_id, created)",
+)
+TEXT = "Текст поста " * 40
+
+
+class Connections:
+    """
+    Connections as the project opens them: a new one per operation with
+    the defaults, or one kept open and tuned with SQLITE_PRAGMAS.
+    """
+
+    def __init__(self, path, tuned, timeout):
+        self.path = path
+        self.tuned = tuned
+        self.timeout = timeout
+        self.connection = self.connect() if tuned else None
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        if self.tuned:
+            for statement in pragma_statements(settings.SQLITE_PRAGMAS):
+                connection.execute(statement)
+        return connection
+
+    def run(self, operation):
+        if self.tuned:
+            return operation(self.connection)
+        connection = self.connect()
+        try:
+            return operation(connection)
+        finally:
+            connection.close()
+
+
+def read_feed(connection):
+    posts = connection.execute(
+        "SELECT id, text FROM post ORDER BY pub_date DESC LIMIT 10"
+    ).fetchall()
+    connection.execute(
+        "SELECT text FROM comment WHERE post_id = ? "
+        "ORDER BY created DESC LIMIT 10",
+        (posts[0][0],),
+    ).fetchall()
+
+
+def write_comment(connection):
+    with connection:
+        connection.execute(
+            "INSERT INTO comment (post_id, text, created) VALUES "
+            "((SELECT MAX(id) FROM post) - abs(random() % 10), ?, ?)",
+            ("Комментарий", time.time()),
+        )
+
+
+def worker(path, tuned, timeout, role, duration, results):
+    connections = Connections(path, tuned, timeout)
+    operation = read_feed if role == "read" else write_comment
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connections.run(operation)
+        except sqlite3.OperationalError:
+            # "database is locked" after waiting for the timeout.
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    results.put((role, latencies, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure reader and writer throughput of concurrent processes on "
+        "an SQLite database with the default settings and tuned ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument(
+            "--duration", type=float, default=5, help="Seconds per run"
+        )
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=5,
+            help="Seconds to wait for a lock, sqlite3's default",
+        )
+        parser.add_argument("--output", help="Write the JSON report here")
+
+    def handle(self, *args, **options):
+        report = {
+            "benchmark": "sqlite",
+            "environment": environment(),
+            "options": {
+                name: options[name]
+                for name in (
+                    "readers", "writers", "duration", "posts", "timeout"
+                )
+            },
+            "pragmas": settings.SQLITE_PRAGMAS,
+            "runs": {},
+        }
+        for name, tuned in (("default", False), ("tuned", True)):
+            directory = tempfile.mkdtemp(prefix="bench-sqlite-")
+            try:
+                path = os.path.join(directory, "bench.sqlite3")
+                self.create(path, options["posts"])
+                report["runs"][name] = self.run(path, tuned, options)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        write_report(report, options["output"], self.stdout)
+
+    def create(self, path, count):
+        connection = sqlite3.connect(path)
+        with connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+            connection.executemany(
+                "INSERT INTO post (text, pub_date) VALUES (?, ?)",
+                ((TEXT, number) for number in range(count)),
+            )
+        connection.close()
+
+    def run(self, path, tuned, options):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        roles = ["read"] * options["readers"] + ["write"] * options["writers"]
+        workers = [
+            context.Process(
+                target=worker,
+                args=(
+                    path,
+                    tuned,
+                    options["timeout"],
+                    role,
+                    options["duration"],
+                    results,
+                ),
+            )
+            for role in roles
+        ]
+        for process in workers:
+            process.start()
+        outcomes = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+        run = {}
+        for role in ("read", "write"):
+            latencies = [
+                value
+                for kind, values, _ in outcomes
+                if kind == role
+                for value in values
+            ]
+            errors = sum(count for kind, _, count in outcomes if kind == role)
+            run[f"{role}s"] = summarize(
+                latencies, options["duration"], errors
+            )
+        return run
@@ -0,0 +1,108 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from core import tasks
+
+
+class Worker:
+    """
+    Runs queued tasks until stopped or, in burst mode, until idle. Idle
+    workers prune finished tasks every TASK_PRUNE_INTERVAL seconds.
+    """
+
+    def __init__(self, burst=False, poll_interval=None):
+        self.burst = burst
+        self.poll_interval = poll_interval or settings.TASK_POLL_INTERVAL
+        self.stopping = False
+        self.pruned_at = None
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def prune(self):
+        now = time.monotonic()
+        if (
+            self.pruned_at is None
+            or now - self.pruned_at >= settings.TASK_PRUNE_INTERVAL
+        ):
+            tasks.prune()
+            self.pruned_at = now
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        processed = 0
+        while not self.stopping:
+            close_old_connections()
+            if tasks.run_next():
+                processed += 1
+                continue
+            self.prune()
+            if self.burst:
+                break
+            time.sleep(self.poll_interval)
+        return processed
+
+
+def work(burst, poll_interval):
+    Worker(burst, poll_interval).run()
+
+
+class Command(BaseCommand):
+    help = "Run background tasks from the database queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of worker processes",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=None,
+            help="Seconds to sleep when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(caches["default"], LocMemCache):
+            # Tasks bump cache versions, e.g. of a post whose thumbnails
+            # are ready, which the site would never see.
+            raise CommandError(
+                "The cache is local to this process, set CACHE_LOCATION "
+                "to a cache shared with the site"
+            )
+        burst, poll_interval = options["burst"], options["poll_interval"]
+        if options["processes"] == 1:
+            processed = Worker(burst, poll_interval).run()
+            self.stdout.write(f"Processed {processed} tasks")
+            return
+        # Children must open their own database connections.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=work, args=(burst, poll_interval))
+            for _ in range(options["processes"])
+        ]
+        for worker in workers:
+            worker.start()
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(
+            signal.SIGTERM,
+            lambda *args: [worker.terminate() for worker in workers],
+        )
+        for worker in workers:
+            worker.join()
+        self.stdout.write(f"{len(workers)} workers stopped")
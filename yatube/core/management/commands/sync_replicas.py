@@ -0,0 +1,58 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core import routers
+
+
+def copy_database(source, target):
+    """
+    Copy the SQLite database file source over target with the online
+    backup API: readers of target wait for the copy to finish and never
+    see half of it, and writers of source are not blocked.
+    """
+    primary = sqlite3.connect(source)
+    replica = sqlite3.connect(target)
+    try:
+        primary.backup(replica)
+    finally:
+        replica.close()
+        primary.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database to the read replicas, once or "
+        "every --interval seconds. A stand-in for real replication"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep copying, waiting this many seconds between copies",
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        replicas = [
+            settings.DATABASES[alias] for alias in settings.DATABASE_REPLICAS
+        ]
+        if not replicas:
+            raise CommandError("No replicas, set DATABASE_REPLICAS")
+        for database in [primary] + replicas:
+            if database["ENGINE"] != "django.db.backends.sqlite3":
+                raise CommandError("Only SQLite databases can be copied")
+        while True:
+            for alias, replica in zip(settings.DATABASE_REPLICAS, replicas):
+                # Holds every commit made before the copy started.
+                started = time.time()
+                copy_database(primary["NAME"], replica["NAME"])
+                routers.mark_synced(alias, started)
+            self.stdout.write(f"Synced {len(replicas)} replicas")
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
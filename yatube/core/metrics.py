@@ -0,0 +1,240 @@
+"""
+Request metrics in Prometheus text format.
+
+MetricsMiddleware measures every request: total latency, the number and
+time of SQL queries and the time spent rendering templates. Observations
+go to histograms labelled by the resolved URL name, e.g. posts:index.
+Histograms have fixed buckets and the set of URL names is fixed too, so
+memory does not grow with traffic. Each process keeps its own numbers,
+Prometheus sums them over the scraped processes.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.backends.django import Template
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+UNRESOLVED = "<unresolved>"
+
+_measurement = ContextVar("measurement", default=None)
+
+
+def escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{escape(value)}"' for name, value in labels)
+    return "{" + pairs + "}"
+
+
+def format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def expose(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            series = sorted(
+                (labels, list(values))
+                for labels, values in self._series.items()
+            )
+        for labels, values in series:
+            yield from self.samples(labels, values)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._series.setdefault(key, [0])
+            values[0] += amount
+
+    def samples(self, labels, values):
+        yield f"{self.name}{format_labels(labels)} {values[0]}"
+
+
+class Histogram(Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets):
+        super().__init__(name, documentation)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._series.get(key)
+            if values is None:
+                # One count per bucket, then the sum of observations.
+                values = self._series[key] = [0] * len(self.buckets) + [0]
+            values[index] += 1
+            values[-1] += value
+
+    def samples(self, labels, values):
+        total = 0
+        for bound, count in zip(self.buckets, values):
+            total += count
+            bucket_labels = labels + (("le", format_number(bound)),)
+            yield f"{self.name}_bucket{format_labels(bucket_labels)} {total}"
+        yield f"{self.name}_sum{format_labels(labels)} {values[-1]}"
+        yield f"{self.name}_count{format_labels(labels)} {total}"
+
+
+REQUESTS = Counter(
+    "yatube_requests_total", "Requests by URL name and status code."
+)
+LATENCY = Histogram(
+    "yatube_request_duration_seconds",
+    "Time from the request reaching the middleware to the response.",
+    LATENCY_BUCKETS,
+)
+QUERIES = Histogram(
+    "yatube_db_queries", "SQL queries per request.", QUERY_BUCKETS
+)
+QUERY_TIME = Histogram(
+    "yatube_db_duration_seconds",
+    "Time spent executing SQL queries per request.",
+    LATENCY_BUCKETS,
+)
+RENDER_TIME = Histogram(
+    "yatube_template_render_seconds",
+    "Time spent rendering templates per request, SQL queries included.",
+    LATENCY_BUCKETS,
+)
+CACHE_FETCHES = Counter(
+    "yatube_cache_fetches_total",
+    "Reads of stampede protected cache entries by name and result: hit, "
+    "miss, refresh, early_refresh, stale, wait or timeout.",
+)
+STAMPEDES = Counter(
+    "yatube_cache_stampedes_total",
+    "Requests that found the entry being rebuilt by another request.",
+)
+REGISTRY = (
+    REQUESTS,
+    LATENCY,
+    QUERIES,
+    QUERY_TIME,
+    RENDER_TIME,
+    CACHE_FETCHES,
+    STAMPEDES,
+)
+
+
+def expose():
+    lines = [line for metric in REGISTRY for line in metric.expose()]
+    return "\n".join(lines) + "\n"
+
+
+class Measurement:
+    """Counters of one request, also used as a query execute wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.render_time = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED
+    return match.view_name
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        measurement = Measurement()
+        token = _measurement.set(measurement)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(measurement)
+                    )
+                response = self.get_response(request)
+        finally:
+            _measurement.reset(token)
+        elapsed = time.perf_counter() - start
+        view = view_name(request)
+        REQUESTS.inc(view=view, status=response.status_code)
+        LATENCY.observe(elapsed, view=view)
+        QUERIES.observe(measurement.queries, view=view)
+        QUERY_TIME.observe(measurement.query_time, view=view)
+        RENDER_TIME.observe(measurement.render_time, view=view)
+        return response
+
+
+def timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        measurement = _measurement.get()
+        if measurement is None or measurement.rendering:
+            return render(self, *args, **kwargs)
+        measurement.rendering = True
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            measurement.rendering = False
+            measurement.render_time += time.perf_counter() - start
+
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument_templates():
+    """
+    Time Django template rendering. A template rendered while another
+    one is rendering, e.g. by a template tag, is not counted twice.
+    """
+    if not getattr(Template.render, "timed", False):
+        Template.render = timed_render(Template.render)
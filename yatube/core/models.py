@@ -9,3 +9,52 @@ class CoreModel(models.Model):
     class Meta:
         abstract = True
         ordering = ("-pub_date",)
+
+
+class Task(models.Model):
+    """
+    A background job: a dotted path to a function with JSON arguments.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField("Функция", max_length=200)
+    payload = models.TextField("Аргументы", default="{}")
+    key = models.CharField(
+        "Ключ",
+        max_length=255,
+        blank=True,
+        db_index=True,
+        help_text="Задачи с одинаковым ключом не ставятся в очередь дважды",
+    )
+    status = models.CharField(
+        "Статус", max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveIntegerField("Попытки", default=0)
+    max_attempts = models.PositiveIntegerField("Максимум попыток")
+    run_at = models.DateTimeField("Запустить после")
+    locked_until = models.DateTimeField(
+        "Заблокирована до", null=True, blank=True
+    )
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    created = models.DateTimeField("Создана", auto_now_add=True)
+
+    class Meta:
+        ordering = ("run_at", "id")
+        indexes = [
+            models.Index(
+                fields=["status", "run_at", "id"], name="task_queue_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.status}]"
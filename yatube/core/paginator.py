@@ -0,0 +1,189 @@
+import base64
+import binascii
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+KEYSET = ("pub_date", "id")
+
+Position = namedtuple("Position", ("backwards", "key", "pk"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def dump_date(value):
+    return value.isoformat()
+
+
+def load_date(raw):
+    value = parse_datetime(raw)
+    if value is None:
+        raise ValueError(raw)
+    return value
+
+
+def encode_cursor(key, pk, backwards=False, dump=dump_date):
+    direction = "p" if backwards else "n"
+    raw = f"{direction}|{dump(key)}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, load=load_date):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, key, pk = raw.split("|")
+        key = load(key)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if direction not in ("n", "p"):
+        raise InvalidCursor(cursor)
+    return Position(direction == "p", key, pk)
+
+
+def newest_first(keyset):
+    return [f"-{field}" for field in keyset]
+
+
+class CursorPaginator(Paginator):
+    """
+    Keyset paginator over (pub_date, id) by default, newest first.
+    Each page is a single indexed range query: no COUNT(*), no OFFSET.
+    Page numbers are relative in this mode, use next_cursor and
+    previous_cursor for navigation.
+
+    keyset names the date and id fields of object_list to paginate by,
+    or a single unique field, subclasses paginating by another kind of
+    key override dump_key and load_key. transform, if given, maps the
+    fetched rows to the objects put on the page, e.g. timeline entries
+    to their posts.
+    """
+
+    is_cursor = True
+    dump_key = staticmethod(dump_date)
+    load_key = staticmethod(load_date)
+
+    def __init__(
+        self, object_list, per_page, keyset=KEYSET, transform=None, **kwargs
+    ):
+        self.date_field, self.id_field = keyset[0], keyset[-1]
+        self.transform = transform
+        object_list = object_list.order_by(*newest_first(keyset))
+        super().__init__(object_list, per_page, **kwargs)
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._has_next = False
+        self._has_previous = False
+
+    @cached_property
+    def num_pages(self):
+        number = 2 if self._has_previous else 1
+        return number + 1 if self._has_next else number
+
+    def get_page(self, cursor=None):
+        """
+        Return the page located by cursor. Missing or malformed cursors
+        fall back to the first page, like Paginator.get_page does.
+        """
+        try:
+            position = (
+                decode_cursor(cursor, load=self.load_key) if cursor else None
+            )
+        except InvalidCursor:
+            position = None
+        if position is None:
+            return self._first_page()
+        if position.backwards:
+            return self._page_before(position)
+        return self._page_after(position)
+
+    def _keyset_filter(self, position, lookup):
+        return Q(**{f"{self.date_field}__{lookup}": position.key}) | Q(
+            **{
+                self.date_field: position.key,
+                f"{self.id_field}__{lookup}": position.pk,
+            }
+        )
+
+    def _cursor(self, item, backwards=False):
+        return encode_cursor(
+            getattr(item, self.date_field),
+            getattr(item, self.id_field),
+            backwards=backwards,
+            dump=self.dump_key,
+        )
+
+    def _first_page(self):
+        items = list(self.object_list[:self.per_page + 1])
+        return self._make_page(items, has_previous=False)
+
+    def _page_after(self, position):
+        keyset = self._keyset_filter(position, "lt")
+        items = list(self.object_list.filter(keyset)[:self.per_page + 1])
+        return self._make_page(items, has_previous=True)
+
+    def _page_before(self, position):
+        keyset = self._keyset_filter(position, "gt")
+        oldest_first = (self.date_field, self.id_field)
+        items = list(
+            self.object_list.filter(keyset).order_by(*oldest_first)[
+                :self.per_page + 1
+            ]
+        )
+        if len(items) <= self.per_page:
+            # Reached the newest posts, show a full first page instead.
+            return self._first_page()
+        items = items[:self.per_page][::-1]
+        self._has_previous = self._has_next = True
+        self.previous_cursor = self._cursor(items[0], backwards=True)
+        self.next_cursor = self._cursor(items[-1])
+        return self._page(items, 2)
+
+    def _make_page(self, items, has_previous):
+        self._has_next = len(items) > self.per_page
+        self._has_previous = has_previous
+        items = items[:self.per_page]
+        if self._has_next:
+            self.next_cursor = self._cursor(items[-1])
+        if has_previous and items:
+            self.previous_cursor = self._cursor(items[0], backwards=True)
+        return self._page(items, 2 if has_previous else 1)
+
+    def _page(self, items, number):
+        if self.transform is not None:
+            items = self.transform(items)
+        return Page(items, number, self)
+
+
+def paginate(request, queryset, per_page=None, keyset=KEYSET, transform=None):
+    """
+    Return the requested page of queryset.
+    Legacy ?page=N links are served by the offset Paginator,
+    everything else uses cursor pagination.
+    """
+    per_page = per_page or settings.PAGINATION_LIMIT
+    page_number = request.GET.get("page")
+    if page_number is not None:
+        queryset = queryset.order_by(*newest_first(keyset))
+        page = Paginator(queryset, per_page).get_page(page_number)
+        if transform is not None:
+            page.object_list = transform(page.object_list)
+        return page
+    paginator = CursorPaginator(
+        queryset, per_page, keyset=keyset, transform=transform
+    )
+    return paginator.get_page(request.GET.get("cursor"))
+
+
+def page_key(request):
+    """Part of the request that selects the page, for cache keys."""
+    return "{}:{}".format(
+        request.GET.get("page", ""), request.GET.get("cursor", "")
+    )
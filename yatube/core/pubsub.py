@@ -0,0 +1,185 @@
+"""
+Publish/subscribe of small messages between the requests of a site.
+
+A message published on a channel is handed to every subscription of the
+channel once: publishing costs one delivery per subscriber, whatever
+they do with it, e.g. an event stream forwarding it to its client.
+
+With PUBSUB_SOCKET_DIR unset, subscribers are the requests of the same
+process, enough for runserver or a single ASGI process. Sites served by
+several processes set it to a directory: each process with subscribers
+binds a Unix datagram socket there, and a message is sent to each socket
+with one datagram, received by a thread of that process and delivered
+to its subscriptions. Sockets of processes that died are removed by the
+first publisher that finds them dead.
+
+Delivery is at most once: a message published while nobody listens, or
+dropped because a process is not keeping up, is lost. Subscribers catch
+up from the database when it matters, see posts.live.
+"""
+import asyncio
+import atexit
+import glob
+import logging
+import os
+import queue
+import socket
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Largest datagram received, a bigger message is dropped by the sender.
+MAX_PACKET = 256 * 1024
+
+
+class Subscription:
+    """Messages of one channel for one consumer, sync or async."""
+
+    def __init__(self, hub, channel):
+        self.hub = hub
+        self.channel = channel
+        self.messages = queue.SimpleQueue()
+        self.wakeup = None
+
+    def put(self, message):
+        """Deliver message, from any thread."""
+        self.messages.put(message)
+        wakeup = self.wakeup
+        if wakeup is not None:
+            loop, event = wakeup
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The loop was closed, nobody is waiting.
+                pass
+
+    def get(self, timeout):
+        """Next message, raising queue.Empty after timeout seconds."""
+        return self.messages.get(timeout=timeout)
+
+    async def wait(self, timeout):
+        """
+        Next message without blocking the event loop, raising
+        asyncio.TimeoutError after timeout seconds.
+        """
+        if self.wakeup is None:
+            self.wakeup = (asyncio.get_running_loop(), asyncio.Event())
+        event = self.wakeup[1]
+        while True:
+            event.clear()
+            try:
+                return self.messages.get_nowait()
+            except queue.Empty:
+                await asyncio.wait_for(event.wait(), timeout)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    def __init__(self, socket_dir=None):
+        self._socket_dir = socket_dir
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+        self.socket = None
+        self.socket_path = None
+
+    @property
+    def socket_dir(self):
+        return self._socket_dir or settings.PUBSUB_SOCKET_DIR
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self.lock:
+            self.subscriptions[channel].add(subscription)
+            if self.socket_dir and self.socket is None:
+                self.listen()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.channel]
+
+    def subscribers(self, channel):
+        with self.lock:
+            return len(self.subscriptions.get(channel, ()))
+
+    def deliver(self, channel, message):
+        """Hand message to the subscriptions of this process."""
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def publish(self, channel, message):
+        """Publish the bytes message on channel to every process."""
+        if not self.socket_dir:
+            self.deliver(channel, message)
+            return
+        packet = channel.encode() + b"\n" + message
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            sender.setblocking(False)
+            for path in glob.glob(os.path.join(self.socket_dir, "*.sock")):
+                try:
+                    sender.sendto(packet, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Its process is gone.
+                    remove(path)
+                except OSError as error:
+                    logger.warning("Dropped a message to %s: %s", path, error)
+
+    def listen(self):
+        os.makedirs(self.socket_dir, exist_ok=True)
+        self.socket_path = os.path.join(
+            self.socket_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        )
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket.bind(self.socket_path)
+        atexit.register(self.close)
+        threading.Thread(
+            target=self.receive, args=(self.socket,), daemon=True
+        ).start()
+
+    def receive(self, listener):
+        while True:
+            try:
+                packet = listener.recv(MAX_PACKET)
+            except OSError:
+                packet = b""
+            if not packet:
+                # Closed, see close().
+                return
+            channel, _, message = packet.partition(b"\n")
+            self.deliver(channel.decode(), message)
+
+    def close(self):
+        with self.lock:
+            if self.socket is None:
+                return
+            try:
+                # Wakes the receiving thread up.
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.socket.close()
+            remove(self.socket_path)
+            self.socket = None
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+hub = Hub()
@@ -0,0 +1,123 @@
+"""
+Read replicas.
+
+Views marked with replica_reads send their queries to a random replica
+(settings.DATABASE_REPLICAS) when the request is a GET or HEAD; every
+other query goes to the primary, the default database. Writes always go
+to the primary, whichever view makes them.
+
+Replicas lag behind the primary, so a user who has just written must not
+read from them: once a request has written anything, ReplicaMiddleware
+pins its client to the primary for REPLICA_STICKINESS seconds with a
+cookie, and the rest of that request reads from the primary too.
+
+Pages and fragments are cached under the versions of core.cache, bumped
+on the primary: built from a replica that has not caught up yet, the old
+rows would be cached, or answered with a 304, under the new version. So
+a request only reads from a replica whose last sync started after the
+last bump was committed; sync_replicas records the sync positions in
+the cache shared with the site. Until one has synced, reads go to the
+primary.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import changed_at
+
+PIN_COOKIE = "primary"
+SAFE_METHODS = ("GET", "HEAD")
+SYNCED_KEY_PREFIX = "replica_synced"
+
+_state = ContextVar("replica_state", default=None)
+
+
+class RequestState:
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+        self.replica = None
+
+
+def synced_key(alias):
+    return f"{SYNCED_KEY_PREFIX}:{alias}"
+
+
+def mark_synced(alias, started):
+    """Record that replica alias holds the commits made before started."""
+    cache.set(synced_key(alias), started, None)
+
+
+def choose_replica():
+    """A random replica synced since the last change, or None."""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return None
+    changed = changed_at()
+    synced = cache.get_many([synced_key(alias) for alias in replicas])
+    fresh = [
+        alias
+        for alias in replicas
+        if synced.get(synced_key(alias), 0) > changed
+    ]
+    return random.choice(fresh) if fresh else None
+
+
+def replica_reads(view):
+    """Let GET requests to view read from a replica."""
+    view.replica_reads = True
+    return view
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.use_replica and not state.wrote:
+            if state.replica is None:
+                # One replica, and one look at the positions, per request.
+                state.replica = choose_replica() or DEFAULT_DB_ALIAS
+            return state.replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the migrated primary.
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.REPLICA_STICKINESS
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        state.use_replica = (
+            getattr(view_func, "replica_reads", False)
+            and request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+        )
@@ -0,0 +1,25 @@
+"""
+SQLite tuning.
+
+Every new SQLite connection gets settings.SQLITE_PRAGMAS. The defaults
+switch to WAL journaling, where readers no longer wait for a writer and
+a writer no longer waits for readers, relax fsync to the end of each
+checkpoint (synchronous=NORMAL, still safe against corruption in WAL
+mode) and give each connection a larger page cache and a memory mapped
+view of the file. Pragmas only apply to the connection that runs them,
+so connections are kept open between requests with CONN_MAX_AGE.
+"""
+from django.conf import settings
+
+
+def pragma_statements(pragmas):
+    return [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+
+def configure(sender, connection, **kwargs):
+    """connection_created receiver applying SQLITE_PRAGMAS."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(settings.SQLITE_PRAGMAS):
+            cursor.execute(statement)
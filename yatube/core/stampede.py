@@ -0,0 +1,149 @@
+"""
+Cache stampede protection.
+
+fetch() reads through the cache like cache.get_or_set, with three
+differences that matter for hot entries:
+
+* Single flight: when an entry has to be rebuilt, only the request that
+  takes a short lock in the cache computes it. The others serve the
+  previous value if there is one, or wait for the new one.
+* Stale while revalidate: entries stay in the cache STALE_TIMEOUT
+  seconds past their freshness, so there is something to serve while
+  they are rebuilt. An entry built from an older version of the data is
+  served the same way, but never to the request rebuilding it.
+* Early refresh (XFetch): a request recomputes a still fresh entry with
+  a probability that grows as the expiry gets closer and with the time
+  the value took to compute, so a hot entry is usually refreshed by a
+  single request before it expires at all.
+
+Every read is counted in core.metrics by name and result.
+"""
+import hashlib
+import math
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import get_version
+from .metrics import CACHE_FETCHES, STAMPEDES
+
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+
+
+def should_refresh(expires, delta, beta, now):
+    """XFetch: expire early, at random, by about delta * beta seconds."""
+    return now - delta * beta * math.log(1 - random.random()) >= expires
+
+
+def fetch(name, key, compute, timeout, version=None, beta=1.0,
+          cacheable=None):
+    """
+    Return the cached value of key, or compute() it. name labels the
+    metrics and must come from a small fixed set, e.g. a fragment name.
+    """
+    entry = cache.get(key)
+    now = time.time()
+    fresh = False
+    if entry is not None:
+        value, built_from, expires, delta = entry
+        fresh = built_from == version and now < expires
+        if fresh and not should_refresh(expires, delta, beta, now):
+            CACHE_FETCHES.inc(name=name, result="hit")
+            return value
+    lock = f"{key}:lock"
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            value = rebuild(key, compute, timeout, version, cacheable)
+        finally:
+            cache.delete(lock)
+        if entry is None:
+            result = "miss"
+        else:
+            result = "early_refresh" if fresh else "refresh"
+        CACHE_FETCHES.inc(name=name, result=result)
+        return value
+    STAMPEDES.inc(name=name)
+    if entry is not None:
+        CACHE_FETCHES.inc(name=name, result="hit" if fresh else "stale")
+        return value
+    return wait(name, key, compute, version)
+
+
+def rebuild(key, compute, timeout, version, cacheable):
+    start = time.perf_counter()
+    value = compute()
+    delta = time.perf_counter() - start
+    if cacheable is None or cacheable(value):
+        cache.set(
+            key,
+            (value, version, time.time() + timeout, delta),
+            timeout + settings.STALE_TIMEOUT,
+        )
+    return value
+
+
+def wait(name, key, compute, version):
+    """Wait for the value another request is computing."""
+    deadline = time.time() + LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry[1] == version:
+            CACHE_FETCHES.inc(name=name, result="wait")
+            return entry[0]
+    # The request holding the lock died or is stuck: stop waiting.
+    CACHE_FETCHES.inc(name=name, result="timeout")
+    return compute()
+
+
+def cacheable_response(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def cache_view(timeout, namespaces=()):
+    """
+    Cache the responses of a view to anonymous GET requests with fetch().
+    Responses are rebuilt as soon as one of the versioned namespaces
+    (see core.cache) changes; namespaces may also be a function of the
+    view arguments returning them. Pages of logged in users show the
+    user and are never cached.
+    """
+
+    def decorator(view):
+        name = f"{view.__module__}.{view.__name__}"
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in ("GET", "HEAD")
+                or request.user.is_authenticated
+            ):
+                return view(request, *args, **kwargs)
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            spaces = namespaces
+            if callable(spaces):
+                spaces = spaces(request, *args, **kwargs)
+            version = tuple(get_version(space) for space in spaces)
+
+            def render():
+                response = view(request, *args, **kwargs)
+                if hasattr(response, "render"):
+                    response = response.render()
+                return response
+
+            return fetch(
+                name,
+                f"view:{name}:{path}",
+                render,
+                timeout,
+                version,
+                cacheable=cacheable_response,
+            )
+
+        return wrapper
+
+    return decorator
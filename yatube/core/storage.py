@@ -0,0 +1,102 @@
+"""
+Content-addressed file storage.
+
+Uploads are stored under the SHA-256 of their content instead of their
+original name: posts/cat.jpg becomes posts/3f/3f1c...9a.jpg. The same
+picture uploaded twice is one file, and since thumbnail names are
+derived from the source name, one set of thumbnails too.
+
+The upload is streamed chunk by chunk into a temporary file next to its
+destination while it is hashed, then renamed into place, so it is never
+held in memory and readers never see half a file. Files are shared, so
+they must only be deleted once nothing refers to them any more, see
+posts.images.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_PREFIX_LENGTH = 2
+DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+def content_name(directory, digest, extension):
+    return posixpath.join(
+        directory, digest[:HASH_PREFIX_LENGTH], digest + extension.lower()
+    )
+
+
+def content_root(name):
+    """
+    The directory a name is addressed under: its own directory for an
+    upload, e.g. posts for posts/cat.jpg, and the one above the hash
+    prefix for a name already stored, so storing it again keeps it.
+    """
+    directory, filename = posixpath.split(name)
+    parent, prefix = posixpath.split(directory)
+    stem = posixpath.splitext(filename)[0]
+    if DIGEST.fullmatch(stem) and prefix == stem[:HASH_PREFIX_LENGTH]:
+        return parent
+    return directory
+
+
+def file_digest(content):
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # The final name depends on the content only, see _save.
+        return name
+
+    def content_name(self, name, digest):
+        """Where a file uploaded as name with this digest is stored."""
+        extension = posixpath.splitext(name)[1]
+        return content_name(content_root(name), digest, extension)
+
+    def _save(self, name, content):
+        if hasattr(content, "temporary_file_path"):
+            # Already on disk, see posts.uploads: hash it and move it.
+            name = self.content_name(name, file_digest(content))
+            self._move(content.temporary_file_path(), name)
+            return name
+        directory = os.path.dirname(self.path(name))
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".upload")
+        try:
+            with os.fdopen(handle, "wb") as output:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+            name = self.content_name(name, digest.hexdigest())
+            self._move(temporary, name)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return name
+
+    def _move(self, source, name):
+        """Move the file source to name, unless name already exists."""
+        path = self.path(name)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_move_safe(source, path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
@@ -0,0 +1,145 @@
+"""
+Durable background tasks stored in the database.
+
+enqueue() saves a Task row in the current transaction, so a task exists
+exactly when the change that asked for it was committed. Workers
+(manage.py runworker) claim tasks with a conditional UPDATE, which works
+across processes on SQLite as well as on client/server databases. A
+claimed task stays invisible to other workers until its visibility
+timeout ends: if the worker dies, the task is picked up again. Failed
+attempts are retried with exponential backoff until max_attempts.
+
+Arguments may be secrets, e.g. a rendered password reset email: they are
+cleared once the task is done, and finished tasks are deleted after
+TASK_RETENTION by prune(), which runworker calls when idle.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+def task_name(func):
+    if isinstance(func, str):
+        return func
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def enqueue(func, args=(), kwargs=None, delay=0, max_attempts=None, key=""):
+    """
+    Queue func(*args, **kwargs) to run in a worker. func is a module level
+    function or its dotted path, arguments must be JSON serializable.
+    A non-empty key skips the call if a task with the same key is still
+    waiting or running.
+    """
+    if key and Task.objects.filter(
+        key=key, status__in=(Task.QUEUED, Task.RUNNING)
+    ).exists():
+        return None
+    return Task.objects.create(
+        name=task_name(func),
+        payload=json.dumps({"args": list(args), "kwargs": kwargs or {}}),
+        key=key,
+        max_attempts=max_attempts or settings.TASK_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def available(now):
+    waiting = Q(status=Task.QUEUED, run_at__lte=now)
+    abandoned = Q(status=Task.RUNNING, locked_until__lte=now)
+    return Task.objects.filter(
+        waiting | abandoned, attempts__lt=F("max_attempts")
+    )
+
+
+def claim(limit=10):
+    """
+    Lock the next available task for this worker and return it, or None.
+    Tasks taken by another worker in the meantime are skipped.
+    """
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=settings.TASK_VISIBILITY_TIMEOUT)
+    candidates = available(now).order_by("run_at", "id")
+    for pk in candidates.values_list("pk", flat=True)[:limit]:
+        claimed = available(now).filter(pk=pk).update(
+            status=Task.RUNNING,
+            locked_until=locked_until,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def expire():
+    """Fail tasks abandoned by their worker on the last attempt."""
+    return Task.objects.filter(
+        status=Task.RUNNING,
+        locked_until__lte=timezone.now(),
+        attempts__gte=F("max_attempts"),
+    ).update(status=Task.FAILED, last_error="Visibility timeout expired")
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying after the given failed attempts."""
+    delay = settings.TASK_RETRY_DELAY * 2 ** (attempts - 1)
+    return min(delay, settings.TASK_MAX_RETRY_DELAY)
+
+
+def execute(task):
+    """
+    Run a claimed task and record the outcome. The result is only saved
+    while the task is still locked by this worker. Returns True on
+    success.
+    """
+    owned = Task.objects.filter(pk=task.pk, locked_until=task.locked_until)
+    try:
+        payload = json.loads(task.payload)
+        import_string(task.name)(*payload["args"], **payload["kwargs"])
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Task %s #%s failed", task.name, task.pk)
+        if task.attempts >= task.max_attempts:
+            owned.update(status=Task.FAILED, last_error=error)
+        else:
+            retry_at = timezone.now() + timedelta(
+                seconds=backoff(task.attempts)
+            )
+            owned.update(
+                status=Task.QUEUED,
+                run_at=retry_at,
+                locked_until=None,
+                last_error=error,
+            )
+        return False
+    owned.update(status=Task.DONE, locked_until=None, payload="{}")
+    return True
+
+
+def prune():
+    """Delete tasks finished more than TASK_RETENTION ago."""
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_RETENTION)
+    deleted, _ = Task.objects.filter(
+        status__in=(Task.DONE, Task.FAILED), run_at__lte=cutoff
+    ).delete()
+    return deleted
+
+
+def run_next():
+    """Claim and run one task. Returns False if the queue was empty."""
+    expire()
+    task = claim()
+    if task is None:
+        return False
+    execute(task)
+    return True
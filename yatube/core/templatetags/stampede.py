@@ -0,0 +1,56 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.stampede import fetch
+
+register = template.Library()
+
+
+class StampedeCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, name, vary_on, version):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.vary_on = vary_on
+        self.version = version
+
+    def render(self, context):
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        version = self.version.resolve(context) if self.version else None
+        return fetch(
+            self.name,
+            make_template_fragment_key(self.name, vary_on),
+            lambda: self.nodelist.render(context),
+            int(self.timeout.resolve(context)),
+            version,
+        )
+
+
+@register.tag
+def stampede_cache(parser, token):
+    """
+    Like {% cache %}, rebuilt by one request at a time:
+
+        {% stampede_cache timeout name [var ...] [version=var] %}
+
+    Unlike the vary_on variables, a new version does not make a new key:
+    concurrent requests are served the previous fragment while it is
+    rebuilt.
+    """
+    nodelist = parser.parse(("endstampede_cache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"{tokens[0]!r} tag requires at least 2 arguments."
+        )
+    version = None
+    if tokens[-1].startswith("version="):
+        version = parser.compile_filter(tokens.pop()[len("version="):])
+    return StampedeCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(var) for var in tokens[3:]],
+        version,
+    )
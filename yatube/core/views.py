@@ -1,4 +1,10 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import metrics as request_metrics
 
 
 def page_not_found(request, exception):
@@ -15,3 +21,15 @@ def permission_denied(request, exception):
 
 def bad_request(request, reason=""):
     return render(request, "core/403csrf.html")
+
+
+def metrics(request):
+    """Request metrics of this process in Prometheus text format."""
+    token = settings.METRICS_TOKEN
+    given = request.META.get("HTTP_AUTHORIZATION", "")
+    if not token or not constant_time_compare(given, f"Bearer {token}"):
+        raise PermissionDenied
+    return HttpResponse(
+        request_metrics.expose(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
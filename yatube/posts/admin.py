@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db import connections
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
@@ -10,6 +12,18 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
     list_editable = ('group',)
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Look the term up in the full-text index instead of LIKE '%term%'.
+        """
+        match = search.to_match(search_term)
+        supported = search.is_supported(connections[queryset.db])
+        if match is None or not supported:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(pk__in=search.matching_ids(match)), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -0,0 +1,60 @@
+"""
+Rendered post cards.
+
+A post card (author, text, thumbnail, group link) is the same on every
+feed page and in every follow feed it appears in, so it is rendered once
+and cached. The key holds the post id, the time the post was last
+updated and a digest of the author and group names the card shows, so
+an edited post or a renamed group simply gets new keys. A feed page is
+one get_many and a loop over the cards: only the missing cards are
+rendered, and they are stored back with one set_many.
+
+The publication date is shown relative to now ("5 минут назад") and
+would go stale in the cache, so cards hold a placeholder for it that is
+filled in for each response, see posts.dates.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+TEMPLATE = "posts/includes/post_card.html"
+KEY_PREFIX = "post_card:v2"
+
+
+def names_digest(post):
+    """Digest of what the card shows from the author and the group."""
+    author, group = post.author, post.group
+    names = [author.username, author.get_full_name()]
+    if group is not None:
+        names += [group.slug, group.title]
+    return hashlib.md5("\n".join(names).encode()).hexdigest()
+
+
+def card_key(post):
+    return (
+        f"{KEY_PREFIX}:{post.pk}:{post.updated.timestamp()}:"
+        f"{names_digest(post)}"
+    )
+
+
+def render_card(post):
+    return get_template(TEMPLATE).render({"post": post})
+
+
+def render_cards(posts):
+    """HTML of the card of each post, rendering only those not cached."""
+    posts = list(posts)
+    keys = {post.pk: card_key(post) for post in posts}
+    cached = cache.get_many(keys.values())
+    missing = {
+        keys[post.pk]: render_card(post)
+        for post in posts
+        if keys[post.pk] not in cached
+    }
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cached.update(missing)
+    return [mark_safe(cached[keys[post.pk]]) for post in posts]
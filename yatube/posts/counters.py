@@ -0,0 +1,87 @@
+"""
+Denormalized counters for posts, comments and follows.
+
+Counters are changed with F() expressions by signal receivers, so
+templates can print them instead of running COUNT queries. reconcile()
+recomputes all of them from the source tables to repair any drift, e.g.
+after bulk_create or raw SQL.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+USER_COUNTERS = {
+    "posts_count": (Post, "author"),
+    "comments_count": (Comment, "author"),
+    "followers_count": (Follow, "author"),
+    "following_count": (Follow, "user"),
+}
+
+
+def change(queryset, field, delta):
+    """Atomically add delta to field, never going below zero."""
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_user(user_id, field, delta):
+    updated = change(UserStats.objects.filter(pk=user_id), field, delta)
+    if not updated and delta > 0:
+        # The row is missing: build it from the source tables, which
+        # already include the change.
+        reconcile_users(User.objects.filter(pk=user_id))
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        change(Group.objects.filter(pk=group_id), "posts_count", delta)
+
+
+def count_of(model, field):
+    """Correlated COUNT subquery of model rows pointing to OuterRef pk."""
+    rows = (
+        model.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def repair(queryset, field, expression):
+    """Set field to expression where it differs, return rows repaired."""
+    drifted = queryset.annotate(actual=expression).exclude(
+        **{field: F("actual")}
+    )
+    pks = list(drifted.values_list("pk", flat=True))
+    queryset.filter(pk__in=pks).update(**{field: expression})
+    return len(pks)
+
+
+def reconcile_users(users):
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in users.values_list("pk", flat=True)),
+        ignore_conflicts=True,
+    )
+    stats = UserStats.objects.filter(user__in=users)
+    return sum(
+        repair(stats, field, count_of(model, lookup))
+        for field, (model, lookup) in USER_COUNTERS.items()
+    )
+
+
+def reconcile():
+    """Recompute every counter, return the number of rows repaired."""
+    return (
+        reconcile_users(User.objects.all())
+        + repair(Group.objects.all(), "posts_count", count_of(Post, "group"))
+        + repair(
+            Post.objects.all(), "comments_count", count_of(Comment, "post")
+        )
+    )
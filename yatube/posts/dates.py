@@ -0,0 +1,50 @@
+"""
+Dates shown relative to now ("5 минут назад").
+
+Such a date is wrong as soon as the page showing it is cached: post
+cards, the index feed fragment, the /more/ batches and search results
+are all kept for a while. Templates therefore render a placeholder with
+the date, the relative_date filter, and RelativeDatesMiddleware replaces
+the placeholders of each HTML response with naturaltime at the time of
+the request, after every cache.
+"""
+import re
+from datetime import datetime
+
+from django.contrib.humanize.templatetags.humanize import naturaltime
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+PREFIX = "<!-- naturaltime "
+PLACEHOLDER = re.compile(re.escape(PREFIX) + r"(\S+) -->")
+
+
+def placeholder(value):
+    return mark_safe(f"{PREFIX}{value.isoformat()} -->")
+
+
+def fill(html):
+    """html with its placeholders replaced by the dates relative to now."""
+    return PLACEHOLDER.sub(
+        lambda match: conditional_escape(
+            naturaltime(datetime.fromisoformat(match.group(1)))
+        ),
+        html,
+    )
+
+
+class RelativeDatesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = PREFIX.encode()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not response.streaming
+            and response.get("Content-Type", "").startswith("text/html")
+            and self.prefix in response.content
+        ):
+            html = response.content.decode(response.charset)
+            response.content = fill(html).encode(response.charset)
+        return response
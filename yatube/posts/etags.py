@@ -0,0 +1,75 @@
+"""
+ETags for conditional GET.
+
+A page's ETag is a digest of the cache versions (see core.cache) of
+everything it shows and of the user viewing it, so answering 304 Not
+Modified costs a few cache reads and no page queries. The signals bump:
+
+* post:<id> when the post or its comments change,
+* author:<username> when the author's posts or follows change,
+* group:<slug> when posts are added to, edited in or removed from it,
+* names whenever a user or a group is saved or deleted, as their names
+  are shown on most pages.
+"""
+import hashlib
+
+from django.core.cache import cache
+
+from core.cache import get_version
+
+from .signals import (
+    FEED_NAMESPACE,
+    NAMES_NAMESPACE,
+    author_namespace,
+    group_namespace,
+    post_namespace,
+)
+
+
+def make_etag(request, *namespaces):
+    viewer = request.user.pk if request.user.is_authenticated else 0
+    versions = [get_version(space) for space in namespaces]
+    versions.append(get_version(NAMES_NAMESPACE))
+    text = ":".join(map(str, [viewer] + versions))
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+def owners_key(post_id):
+    return "post_owners:{}:{}:{}".format(
+        post_id,
+        get_version(post_namespace(post_id)),
+        get_version(NAMES_NAMESPACE),
+    )
+
+
+def remember_owners(post):
+    """
+    Store the author username and group slug of post for post_detail.
+    The page stores them itself so that checking the ETag never queries:
+    until the page has been rendered once it has no ETag.
+    """
+    slug = post.group.slug if post.group_id else None
+    cache.set(owners_key(post.pk), (post.author.username, slug))
+
+
+def post_detail(request, post_id):
+    owners = cache.get(owners_key(post_id))
+    if owners is None:
+        return None
+    username, slug = owners
+    namespaces = [post_namespace(post_id), author_namespace(username)]
+    if slug is not None:
+        namespaces.append(group_namespace(slug))
+    return make_etag(request, *namespaces)
+
+
+def index(request):
+    return make_etag(request, FEED_NAMESPACE)
+
+
+def profile(request, username):
+    return make_etag(request, author_namespace(username))
+
+
+def group_posts(request, slug):
+    return make_etag(request, group_namespace(slug))
@@ -0,0 +1,127 @@
+"""
+Atom feeds of the index, of groups and of authors.
+
+Feed readers poll. The feed views answer conditional GETs from the same
+cache versions as the pages (see etags), so an unchanged feed costs a
+few cache reads. When the feed has changed, each entry is serialized
+once per post version and cached like the post cards (see cards), and
+the document is streamed around the cached entries.
+"""
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .cards import names_digest
+
+KEY_PREFIX = "atom_entry:v2"
+TITLE_WORDS = 8
+ENCODING = "utf-8"
+
+
+def entry_key(post, host):
+    # Entries hold absolute links, one per host the site is served on.
+    return (
+        f"{KEY_PREFIX}:{host}:{post.pk}:{post.updated.timestamp()}:"
+        f"{names_digest(post)}"
+    )
+
+
+class StreamingAtomFeed(Atom1Feed):
+    """Atom1Feed written piece by piece, with entries serialized apart."""
+
+    def __init__(self, *args, updated, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updated = updated
+
+    def latest_post_date(self):
+        return self.updated
+
+    def header(self):
+        stream = StringIO()
+        handler = SimplerXMLGenerator(stream, ENCODING)
+        handler.startDocument()
+        handler.startElement("feed", self.root_attributes())
+        self.add_root_elements(handler)
+        return stream.getvalue()
+
+    def footer(self):
+        return "</feed>"
+
+    def entry(self, **item):
+        self.items = []
+        self.add_item(**item)
+        stream = StringIO()
+        handler = SimplerXMLGenerator(stream, ENCODING)
+        handler.startElement("entry", self.item_attributes(self.items[0]))
+        self.add_item_elements(handler, self.items[0])
+        handler.endElement("entry")
+        return stream.getvalue()
+
+
+def serialize(feed, request, post):
+    author = post.author
+    url = request.build_absolute_uri(
+        reverse("posts:post_detail", args=(post.pk,))
+    )
+    return feed.entry(
+        title=Truncator(post.text).words(TITLE_WORDS),
+        link=url,
+        # A summary of type html, escaped like the pages show the text.
+        description=linebreaks(post.text, autoescape=True),
+        unique_id=url,
+        pubdate=post.pub_date,
+        updateddate=post.updated,
+        author_name=author.get_full_name() or author.username,
+        author_link=request.build_absolute_uri(
+            reverse("posts:profile", args=(author.username,))
+        ),
+        categories=[post.group.title] if post.group_id else (),
+    )
+
+
+def stream_entries(feed, request, posts):
+    host = request.get_host()
+    keys = {post.pk: entry_key(post, host) for post in posts}
+    cached = cache.get_many(keys.values())
+    missing = {}
+    yield feed.header()
+    for post in posts:
+        key = keys[post.pk]
+        if key not in cached:
+            cached[key] = missing[key] = serialize(feed, request, post)
+        yield cached[key]
+    yield feed.footer()
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+
+
+def atom_response(request, title, link, posts):
+    """
+    Stream the Atom feed of the newest posts, which must come with their
+    author and group.
+    """
+    posts = list(posts[:settings.ATOM_FEED_ENTRIES])
+    feed_url = request.build_absolute_uri()
+    feed = StreamingAtomFeed(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description="",
+        feed_url=feed_url,
+        feed_guid=feed_url,
+        language=settings.LANGUAGE_CODE,
+        updated=max(
+            (post.updated for post in posts), default=timezone.now()
+        ),
+    )
+    return StreamingHttpResponse(
+        stream_entries(feed, request, posts),
+        content_type=feed.content_type,
+    )
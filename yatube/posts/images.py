@@ -0,0 +1,76 @@
+"""
+Reference counts of the uploaded post images.
+
+Uploads are content-addressed (see core.storage), so one file may be
+shown by many posts. StoredImage counts them: signals acquire the image
+of a saved post and release the one it replaced or lost with the post,
+and the last release deletes the file and its thumbnails. Files with no
+StoredImage row, uploaded before counting started and not yet deduped
+(see the dedupe_images command), are never deleted.
+"""
+from collections import Counter, defaultdict
+
+from django.core.exceptions import SuspiciousFileOperation
+from sorl.thumbnail.images import ImageFile
+
+from . import counters, thumbnails
+from .models import Post, StoredImage
+
+BATCH_SIZE = 500
+
+
+def storage():
+    return Post._meta.get_field("image").storage
+
+
+def acquire(name):
+    if not name:
+        return
+    images = StoredImage.objects.filter(name=name)
+    if not counters.change(images, "references", 1):
+        StoredImage.objects.bulk_create(
+            [StoredImage(name=name)], ignore_conflicts=True
+        )
+        counters.change(images, "references", 1)
+
+
+def acquire_all(names):
+    """
+    acquire() every name at once, for posts saved in bulk without their
+    signals. Names given several times are counted as many times.
+    """
+    counts = Counter(name for name in names if name)
+    StoredImage.objects.bulk_create(
+        [StoredImage(name=name) for name in counts],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    by_count = defaultdict(list)
+    for name, count in counts.items():
+        by_count[count].append(name)
+    for count, names in by_count.items():
+        for start in range(0, len(names), BATCH_SIZE):
+            batch = names[start:start + BATCH_SIZE]
+            counters.change(
+                StoredImage.objects.filter(name__in=batch), "references", count
+            )
+
+
+def release(name):
+    if not name:
+        return
+    images = StoredImage.objects.filter(name=name)
+    counters.change(images, "references", -1)
+    deleted, _ = images.filter(references=0).delete()
+    if deleted:
+        remove(name)
+
+
+def remove(name):
+    """Delete the image file and its thumbnails."""
+    try:
+        thumbnails.delete(ImageFile(name, storage()))
+        storage().delete(name)
+    except SuspiciousFileOperation:
+        # Not a file of the storage, e.g. an absolute path.
+        pass
@@ -0,0 +1,72 @@
+"""
+Live comments of a post.
+
+A new comment is published once its transaction commits: its card is
+rendered and encoded as an event once, and every open event stream of
+the post forwards the same bytes to its reader, see core.pubsub. Readers
+do not reload the page to see it.
+
+The page tells the stream the last comment it shows, and EventSource
+sends the last one it got when it reconnects: comments newer than that
+are read from the database first, so none are lost in between. The
+stream subscribes before reading them, a comment may then come twice
+and the page skips the copy.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from core.events import EventStreamResponse, format_event, last_event_id
+from core.pubsub import hub
+
+from .models import Comment
+
+# Most comments read from the database for a stream that reconnects.
+BACKLOG_LIMIT = 50
+
+
+def channel(post_id):
+    return f"comments:{post_id}"
+
+
+def comment_event(comment):
+    html = render_to_string(
+        "posts/includes/comment.html", {"comment": comment}
+    )
+    return format_event(html, event="comment", id=comment.pk)
+
+
+def publish(comment):
+    """Push comment to the readers of its post after the commit."""
+    if not settings.LIVE_COMMENTS:
+        return
+    name = channel(comment.post_id)
+    if not hub.socket_dir and not hub.subscribers(name):
+        # Nobody in this process, the only one, reads the post.
+        return
+    transaction.on_commit(
+        lambda: hub.publish(name, comment_event(comment))
+    )
+
+
+def backlog(post_id, after):
+    """Events of the comments of the post newer than the id after."""
+    if not after.isdigit():
+        return []
+    comments = (
+        Comment.objects.filter(post_id=post_id, pk__gt=after)
+        .select_related("author")
+        .order_by("-pk")[:BACKLOG_LIMIT]
+    )
+    return [comment_event(comment) for comment in reversed(comments)]
+
+
+def stream(request, post_id):
+    subscription = hub.subscribe(channel(post_id))
+    after = last_event_id(request) or request.GET.get("after", "")
+    try:
+        events = backlog(post_id, after)
+    except Exception:
+        subscription.close()
+        raise
+    return EventStreamResponse(subscription, events)
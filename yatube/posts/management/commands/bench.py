@@ -0,0 +1,248 @@
+import http.cookiejar
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmark import environment, summarize, write_report
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# Share of each view in the replayed traffic.
+WORKLOAD = {
+    "index": 30,
+    "group_posts": 10,
+    "profile": 15,
+    "post_detail": 30,
+    "follow_index": 10,
+    "create_post": 5,
+}
+SAMPLE_SIZE = 200
+
+
+class Workload:
+    """Random but reproducible sequence of requests over seeded data."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.slugs = list(
+            Group.objects.values_list("slug", flat=True)[:SAMPLE_SIZE]
+        )
+        self.usernames = list(
+            User.objects.filter(posts__isnull=False)
+            .values_list("username", flat=True)
+            .distinct()[:SAMPLE_SIZE]
+        )
+        self.post_ids = list(
+            Post.objects.values_list("pk", flat=True)[:SAMPLE_SIZE]
+        )
+        if not (self.slugs and self.usernames and self.post_ids):
+            raise CommandError("No data to replay, run seed_data first")
+        self.names = list(WORKLOAD)
+        self.weights = list(WORKLOAD.values())
+
+    def next(self):
+        """Return (view name, method, path, POST data)."""
+        name = self.rng.choices(self.names, self.weights)[0]
+        return (name,) + getattr(self, name)()
+
+    def index(self):
+        return "GET", reverse("posts:index"), None
+
+    def group_posts(self):
+        slug = self.rng.choice(self.slugs)
+        return "GET", reverse("posts:group_list", args=(slug,)), None
+
+    def profile(self):
+        username = self.rng.choice(self.usernames)
+        return "GET", reverse("posts:profile", args=(username,)), None
+
+    def post_detail(self):
+        post_id = self.rng.choice(self.post_ids)
+        return "GET", reverse("posts:post_detail", args=(post_id,)), None
+
+    def follow_index(self):
+        return "GET", reverse("posts:follow_index"), None
+
+    def create_post(self):
+        data = {"text": f"Benchmark post {self.rng.random()}"}
+        return "POST", reverse("posts:create_post"), data
+
+
+class ClientSession:
+    """A logged in user served in process by the Django test client."""
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def request(self, method, path, data):
+        if method == "POST":
+            return self.client.post(path, data).status_code
+        return self.client.get(path).status_code
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """A logged in user talking to a running server over HTTP."""
+
+    def __init__(self, user, password, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect
+        )
+        self.request("GET", reverse("users:login"), None)
+        status = self.request(
+            "POST",
+            reverse("users:login"),
+            {"username": user.username, "password": password},
+        )
+        if status != 302:
+            raise CommandError(f"Could not log in as {user.username}")
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == "csrftoken":
+                return cookie.value
+        return ""
+
+    def request(self, method, path, data):
+        body = None
+        if method == "POST":
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token())
+            body = urllib.parse.urlencode(data).encode()
+        request = urllib.request.Request(
+            self.base_url + path, data=body, method=method
+        )
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a mixed workload against the posts views and print "
+        "throughput and latency percentiles as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--warmup", type=int, default=100)
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server, e.g. http://127.0.0.1:8000. "
+            "Without it requests go through the in-process test client",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Simultaneous users, each in its own thread",
+        )
+        parser.add_argument(
+            "--password",
+            default="benchmark",
+            help="Password given to the users by seed_data",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report here")
+
+    def handle(self, *args, **options):
+        if options["url"] is None:
+            # Measure the application, not the debug toolbar.
+            with override_settings(DEBUG=False):
+                report = self.run(options)
+        else:
+            report = self.run(options)
+        write_report(report, options["output"], self.stdout)
+
+    def session(self, user, options):
+        if options["url"] is None:
+            return ClientSession(user)
+        return HttpSession(user, options["password"], options["url"])
+
+    def run(self, options):
+        concurrency = options["concurrency"]
+        users = list(
+            User.objects.filter(follower__isnull=False)
+            .distinct()
+            .order_by("pk")[:concurrency]
+        )
+        if len(users) < concurrency:
+            raise CommandError("Not enough seeded users, run seed_data")
+        sessions = [self.session(user, options) for user in users]
+        workloads = [
+            Workload(options["seed"] + number) for number in range(concurrency)
+        ]
+        self.replay(
+            sessions[0],
+            Workload(-1),
+            options["warmup"],
+            defaultdict(list),
+            defaultdict(int),
+        )
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        per_session = options["requests"] // concurrency
+        jobs = [
+            (session, workload, per_session, latencies, errors)
+            for session, workload in zip(sessions, workloads)
+        ]
+        start = time.perf_counter()
+        if concurrency == 1:
+            self.replay(*jobs[0])
+        else:
+            threads = [
+                threading.Thread(target=self.replay, args=job) for job in jobs
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - start
+        every = [value for values in latencies.values() for value in values]
+        return {
+            "benchmark": "views",
+            "environment": environment(),
+            "options": {
+                "mode": "http" if options["url"] else "client",
+                "url": options["url"],
+                "requests": per_session * concurrency,
+                "warmup": options["warmup"],
+                "concurrency": concurrency,
+                "seed": options["seed"],
+                "workload": WORKLOAD,
+            },
+            "total": summarize(every, elapsed, sum(errors.values())),
+            "views": {
+                name: summarize(latencies[name], elapsed, errors[name])
+                for name in WORKLOAD
+                if latencies[name]
+            },
+        }
+
+    def replay(self, session, workload, count, latencies, errors):
+        for _ in range(count):
+            name, method, path, data = workload.next()
+            start = time.perf_counter()
+            status = session.request(method, path, data)
+            latencies[name].append(time.perf_counter() - start)
+            if status >= 400:
+                errors[name] += 1
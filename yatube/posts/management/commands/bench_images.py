@@ -0,0 +1,101 @@
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageOps
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from core.benchmark import environment, write_report
+from posts import thumbnails
+from posts.models import Post
+
+# Width in device pixels each kind of client needs for a full width
+# card: the smallest variant at least this wide is what srcset picks.
+CLIENTS = {
+    "phone_1x": 360,
+    "phone_2x": 720,
+    "tablet": 768,
+    "desktop": 960,
+}
+FALLBACK_WIDTH = thumbnails.ASPECT[0]
+
+
+def encode(image, width, format_):
+    """Size in bytes of the width wide crop of image in format_."""
+    height = round(width * thumbnails.ASPECT[1] / thumbnails.ASPECT[0])
+    crop = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    buffer = BytesIO()
+    crop.save(buffer, format_, quality=thumbnail_settings.THUMBNAIL_QUALITY)
+    return len(buffer.getvalue())
+
+
+def chosen_width(needed):
+    wide_enough = [width for width in thumbnails.WIDTHS if width >= needed]
+    return min(wide_enough, default=max(thumbnails.WIDTHS))
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the bytes clients download for the seeded post images "
+        "with responsive variants compared to the single JPEG crop"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--images", type=int, default=100, help="Images to sample"
+        )
+        parser.add_argument("--output", help="Write the JSON report here")
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image="")
+            .order_by("image")
+            .values_list("image", flat=True)
+            .distinct()[:options["images"]]
+        )
+        storage = Post._meta.get_field("image").storage
+        formats = ("JPEG",) + thumbnails.FORMATS
+        sizes = {
+            (width, format_): 0
+            for width in thumbnails.WIDTHS
+            for format_ in formats
+        }
+        sampled = 0
+        for name in names:
+            if not storage.exists(name):
+                continue
+            with storage.open(name) as file:
+                image = Image.open(file)
+                image.load()
+            image = image.convert("RGB")
+            for width, format_ in sizes:
+                sizes[width, format_] += encode(image, width, format_)
+            sampled += 1
+        if not sampled:
+            raise CommandError("No images to measure, run seed_data first")
+        baseline = sizes[FALLBACK_WIDTH, "JPEG"]
+        clients = {}
+        for client, needed in CLIENTS.items():
+            width = chosen_width(needed)
+            clients[client] = {"width": width}
+            for format_ in formats:
+                downloaded = sizes[width, format_]
+                clients[client][format_.lower()] = {
+                    "bytes": downloaded,
+                    "saved_bytes": baseline - downloaded,
+                    "saved_percent": round(
+                        100 * (1 - downloaded / baseline), 1
+                    ),
+                }
+        report = {
+            "benchmark": "images",
+            "environment": environment(),
+            "images": sampled,
+            "formats": list(formats),
+            "baseline": {"width": FALLBACK_WIDTH, "bytes": baseline},
+            "variants": {
+                f"{format_.lower()}_{width}": total
+                for (width, format_), total in sizes.items()
+            },
+            "clients": clients,
+        }
+        write_report(report, options["output"], self.stdout)
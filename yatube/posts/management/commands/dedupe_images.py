@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+
+from core.storage import file_digest
+from posts import images
+from posts.models import Post, StoredImage
+
+from .generate_thumbnails import walk
+
+
+class Command(BaseCommand):
+    help = (
+        "Move post images uploaded under their original names to their "
+        "content-addressed names, merging identical files"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Also delete files of --path that no post shows",
+        )
+        parser.add_argument(
+            "--path",
+            default="posts",
+            help="Storage directory with the original images",
+        )
+
+    def handle(self, *args, **options):
+        storage = images.storage()
+        names = (
+            Post.objects.exclude(image="")
+            .order_by()
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        moved = missing = freed = 0
+        for name in list(names):
+            if not storage.exists(name):
+                missing += 1
+                continue
+            with storage.open(name) as content:
+                target = storage.content_name(name, file_digest(content))
+                if target == name:
+                    continue
+                size = content.size
+                stored = storage.save(name, content)
+            for post in Post.objects.filter(image=name):
+                # Signals move the references and invalidate the pages.
+                post.image.name = stored
+                post.save(update_fields=["image", "updated"])
+            # No post shows the old file now, counted or not.
+            StoredImage.objects.filter(name=name).delete()
+            if storage.exists(name):
+                images.remove(name)
+            moved += 1
+            freed += size
+        if options["prune"] and storage.exists(options["path"]):
+            shown = set(StoredImage.objects.values_list("name", flat=True))
+            shown.update(names)
+            for name in list(walk(storage, options["path"])):
+                if name not in shown:
+                    freed += storage.size(name)
+                    images.remove(name)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Moved {moved} images, freed {freed} bytes"
+                + (f", {missing} files are missing" if missing else "")
+            )
+        )
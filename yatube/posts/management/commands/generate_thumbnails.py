@@ -0,0 +1,51 @@
+import posixpath
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts import thumbnails
+
+
+def walk(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield posixpath.join(path, name)
+    for directory in directories:
+        yield from walk(storage, posixpath.join(path, directory))
+
+
+class Command(BaseCommand):
+    help = "Generate missing thumbnails of the uploaded post images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="posts",
+            help="Storage directory with the original images",
+        )
+
+    def handle(self, *args, **options):
+        if not default_storage.exists(options["path"]):
+            self.stdout.write(f"Nothing to do: no {options['path']}/")
+            return
+        queued = 0
+        for name in walk(default_storage, options["path"]):
+            for geometry_string, thumbnail_options in thumbnails.SIZES:
+                source, thumbnail, resolved = default.backend.resolve(
+                    ImageFile(name, default_storage),
+                    geometry_string,
+                    **thumbnail_options,
+                )
+                if thumbnail.exists():
+                    continue
+                if thumbnails.schedule(
+                    source.name, thumbnail.name, geometry_string, resolved
+                ):
+                    queued += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Queued {queued} thumbnails, run manage.py runworker"
+            )
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized post, comment and follow counters"
+
+    def handle(self, *args, **options):
+        repaired = counters.reconcile()
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired {repaired} drifted counters")
+        )
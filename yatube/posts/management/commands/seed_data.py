@@ -0,0 +1,186 @@
+import random
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from faker import Faker
+from PIL import Image
+
+from posts import counters, images, thumbnails, timeline
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+
+
+def zipf_weights(count, exponent):
+    """Popularity of the ranks 1..count under a power law."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def jpeg(rng, size=(1200, 800)):
+    color = tuple(rng.randrange(256) for _ in range(3))
+    image = Image.new("RGB", size, color)
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a reproducible dataset for benchmarks: "
+        "users, groups, a power-law follow graph, posts and comments"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=5000)
+        parser.add_argument("--comments", type=int, default=10000)
+        parser.add_argument(
+            "--follows",
+            type=int,
+            default=20,
+            help="Average number of authors followed by a user",
+        )
+        parser.add_argument(
+            "--exponent",
+            type=float,
+            default=1.1,
+            help="Power law exponent of author popularity",
+        )
+        parser.add_argument(
+            "--images",
+            type=float,
+            default=0.1,
+            help="Share of posts with an image",
+        )
+        parser.add_argument(
+            "--password",
+            default="benchmark",
+            help="Password of every created user",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.fake = Faker("ru_RU")
+        self.fake.seed_instance(options["seed"])
+        with transaction.atomic():
+            users = self.create_users(options["users"], options["password"])
+            groups = self.create_groups(options["groups"])
+            self.create_follows(
+                users, options["follows"], options["exponent"]
+            )
+            posts = self.create_posts(
+                users, groups, options["posts"], options["exponent"]
+            )
+            self.create_comments(users, posts, options["comments"])
+            illustrated = self.attach_images(posts, options["images"])
+            # bulk_create skips the signals: derive the rest at once.
+            counters.reconcile()
+            timeline.rebuild(users)
+        for post in illustrated:
+            thumbnails.pregenerate(post.image)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(users)} users, {len(groups)} groups, "
+                f"{len(posts)} posts ({len(illustrated)} with images), "
+                f"{options['comments']} comments. Run manage.py runworker "
+                f"to generate thumbnails."
+            )
+        )
+
+    def create_users(self, count, password):
+        start = User.objects.count()
+        password = make_password(password)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"{self.fake.user_name()}{start + number}",
+                    first_name=self.fake.first_name(),
+                    last_name=self.fake.last_name(),
+                    email=self.fake.email(),
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return list(User.objects.order_by("-pk")[:count])[::-1]
+
+    def create_groups(self, count):
+        start = Group.objects.count()
+        Group.objects.bulk_create(
+            Group(
+                title=self.fake.catch_phrase()[:200],
+                slug=f"group-{start + number}",
+                description=self.fake.paragraph(),
+            )
+            for number in range(count)
+        )
+        return list(Group.objects.order_by("-pk")[:count])[::-1]
+
+    def create_follows(self, users, average, exponent):
+        """
+        Every user follows a few authors, the popular ones most often, so
+        some authors end up with a large share of all followers.
+        """
+        weights = zipf_weights(len(users), exponent)
+        follows = []
+        for user in users:
+            wanted = min(
+                int(self.rng.expovariate(1 / average)) + 1, len(users) - 1
+            )
+            authors = set(self.rng.choices(users, weights, k=wanted))
+            authors.discard(user)
+            follows.extend(Follow(user=user, author=a) for a in authors)
+        Follow.objects.bulk_create(
+            follows, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+
+    def create_posts(self, users, groups, count, exponent):
+        weights = zipf_weights(len(users), exponent)
+        authors = self.rng.choices(users, weights, k=count)
+        Post.objects.bulk_create(
+            (
+                Post(
+                    text=self.fake.text(self.rng.randint(50, 1500)),
+                    author=author,
+                    group=self.rng.choice(groups + [None]),
+                )
+                for author in authors
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return list(Post.objects.order_by("-pk")[:count])
+
+    def create_comments(self, users, posts, count):
+        # Fresh and popular posts get most of the comments.
+        weights = zipf_weights(len(posts), 0.8)
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    post=post,
+                    author=self.rng.choice(users),
+                    text=self.fake.sentence(),
+                )
+                for post in self.rng.choices(posts, weights, k=count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+    def attach_images(self, posts, share):
+        chosen = self.rng.sample(posts, int(len(posts) * share))
+        for post in chosen:
+            post.image.save(
+                f"seed-{post.pk}.jpg", ContentFile(jpeg(self.rng)), save=False
+            )
+        Post.objects.bulk_update(chosen, ["image"], batch_size=BATCH_SIZE)
+        # bulk_update skips the signals counting the posts of each file.
+        images.acquire_all(post.image.name for post in chosen)
+        return chosen
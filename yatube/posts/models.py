@@ -10,6 +10,7 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, null=False)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -37,6 +38,21 @@ class Post(CoreModel):
         verbose_name="Группа",
         help_text="Выберите группу",
     )
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    updated = models.DateTimeField("Дата изменения", auto_now=True)
+
+    class Meta(CoreModel.Meta):
+        indexes = [
+            models.Index(fields=["pub_date", "id"], name="post_feed_idx"),
+            models.Index(
+                fields=["author", "pub_date", "id"],
+                name="post_author_feed_idx",
+            ),
+            models.Index(
+                fields=["group", "pub_date", "id"],
+                name="post_group_feed_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -58,6 +74,9 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ("-created",)
+        indexes = [
+            models.Index(fields=["post", "created"], name="comment_post_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -84,3 +103,84 @@ class Follow(models.Model):
             models.UniqueConstraint(
                 fields=['user', 'author'],
                 name="unique_subscription")]
+
+
+class UserStats(models.Model):
+    """
+    Denormalized per-user counters, kept up to date by signals.
+    """
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name="stats",
+        on_delete=models.CASCADE,
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.user)
+
+
+class StoredImage(models.Model):
+    """
+    Number of posts showing an uploaded image, kept up to date by
+    signals. Identical uploads share one file, see core.storage.
+    """
+
+    name = models.CharField("Файл", max_length=100, primary_key=True)
+    references = models.PositiveIntegerField("Ссылки", default=0)
+
+    def __str__(self):
+        return self.name
+
+
+class TimelineEntry(models.Model):
+    """
+    Materialized follow feed: one row per post delivered to a follower.
+    """
+
+    user = models.ForeignKey(
+        User,
+        related_name="timeline",
+        on_delete=models.CASCADE,
+        verbose_name="Подписчик",
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name="timeline_entries",
+        on_delete=models.CASCADE,
+        verbose_name="Пост",
+    )
+    pub_date = models.DateTimeField("Дата публикации")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"],
+                name="unique_timeline_entry")]
+        indexes = [
+            models.Index(
+                fields=["user", "pub_date", "post"], name="timeline_feed_idx"
+            ),
+        ]
+
+
+class TimelineSync(models.Model):
+    """
+    Last time celebrity posts were pulled into the user's timeline.
+    """
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name="timeline_sync",
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+    )
+    pulled_at = models.DateTimeField(
+        "Последняя выборка", null=True, blank=True
+    )
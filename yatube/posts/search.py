@@ -0,0 +1,173 @@
+"""
+Full-text search over post texts with SQLite FTS5.
+
+posts_post_fts is an external content FTS5 table over posts_post: it
+stores only the index, the texts are read back from posts_post. Triggers
+keep it in sync with every insert, update and delete, including
+bulk_create and raw SQL. SQLite drops triggers together with their table
+when a migration remakes posts_post, so install() puts them back and
+rebuilds the index after every migrate.
+
+Results are ranked by bm25 and paginated by (score, id) cursors.
+"""
+import re
+from html import escape
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import FloatField, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.safestring import mark_safe
+
+from core.paginator import CursorPaginator
+
+from .models import Post
+
+TABLE = "posts_post_fts"
+TRIGGERS = {
+    "posts_post_fts_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+    """,
+    "posts_post_fts_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {TABLE}({TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END
+    """,
+    "posts_post_fts_update": f"""
+        CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO {TABLE}({TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+    """,
+}
+KEYSET = ("score", "id")
+MAX_TERMS = 10
+SNIPPET_TOKENS = 24
+# Control characters never appear in tokens, so they safely mark matches
+# in snippets until the text is escaped.
+MATCH_START, MATCH_END = "\x02", "\x03"
+WORD = re.compile(r"\w+")
+
+
+def is_supported(connection):
+    return connection.vendor == "sqlite"
+
+
+def install(sender=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Create missing sync triggers and rebuild the index if any was missing.
+    """
+    connection = connections[using]
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        missing = [
+            sql for name, sql in TRIGGERS.items() if name not in existing
+        ]
+        if not missing:
+            return
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [TABLE],
+        )
+        if cursor.fetchone() is None:
+            return
+        for sql in missing:
+            cursor.execute(sql)
+        rebuild(cursor)
+
+
+def rebuild(cursor):
+    cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')")
+
+
+def to_match(query):
+    """
+    Turn user input into an FTS5 query: all words must match, the last
+    one as a prefix so results show up while typing. Every word is
+    quoted, FTS5 operators in the input are matched literally.
+    """
+    words = WORD.findall(query)[:MAX_TERMS]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def matching_ids(match):
+    return RawSQL(
+        f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s", [match]
+    )
+
+
+def unranked(posts):
+    """posts annotated like the results of search(), all ranked equal."""
+    return posts.annotate(
+        score=Value(0.0, output_field=FloatField()),
+        snippet=Value("", output_field=TextField()),
+    )
+
+
+def search(query):
+    """
+    Posts matching query, annotated with score (higher is better) and
+    snippet. Returns an empty queryset if query has no words.
+    """
+    match = to_match(query)
+    if match is None:
+        return unranked(Post.objects.none())
+    posts = Post.objects.select_related("author", "group")
+    if not is_supported(connections[posts.db]):
+        return unranked(posts.filter(text__icontains=query))
+    return posts.extra(
+        tables=[TABLE],
+        where=[f"{TABLE}.rowid = posts_post.id", f"{TABLE} MATCH %s"],
+        params=[match],
+    ).annotate(
+        score=RawSQL(f"-bm25({TABLE})", [], output_field=FloatField()),
+        snippet=RawSQL(
+            f"snippet({TABLE}, 0, %s, %s, '…', %s)",
+            [MATCH_START, MATCH_END, SNIPPET_TOKENS],
+            output_field=TextField(),
+        ),
+    )
+
+
+def highlight(snippet):
+    """Escape a snippet and wrap the matched words in <mark>."""
+    html = escape(snippet)
+    html = html.replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+    return mark_safe(html)
+
+
+def highlight_all(posts):
+    for post in posts:
+        post.highlighted = highlight(post.snippet or post.text)
+    return posts
+
+
+class RankedPaginator(CursorPaginator):
+    """Cursor paginator over (score, id), best matches first."""
+
+    dump_key = staticmethod(repr)
+    load_key = staticmethod(float)
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super().__init__(
+            object_list,
+            per_page,
+            keyset=KEYSET,
+            transform=highlight_all,
+            **kwargs,
+        )
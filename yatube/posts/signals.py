@@ -0,0 +1,217 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cache import bump_version
+
+from . import counters, images, thumbnails, timeline, uploads
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+FEED_NAMESPACE = "posts"
+# User and group names are shown on most pages.
+NAMES_NAMESPACE = "names"
+
+
+def post_namespace(post_id):
+    return f"post:{post_id}"
+
+
+def author_namespace(username):
+    return f"author:{username}"
+
+
+def group_namespace(slug):
+    return f"group:{slug}"
+
+
+def invalidate_post_pages(post_id, username, slugs=()):
+    bump_version(
+        post_namespace(post_id),
+        author_namespace(username),
+        *(group_namespace(slug) for slug in slugs if slug is not None),
+    )
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, **kwargs):
+    if instance.pk is not None:
+        previous = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list("group_id", "image")
+            .first()
+        )
+        if previous is not None:
+            (
+                instance._previous_group_id,
+                instance._previous_image,
+            ) = previous
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.author_id, "posts_count", 1)
+        counters.change_group(instance.group_id, 1)
+        return
+    previous_group_id = getattr(instance, "_previous_group_id", None)
+    if previous_group_id != instance.group_id:
+        counters.change_group(previous_group_id, -1)
+        counters.change_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, "posts_count", -1)
+    counters.change_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def count_image(sender, instance, created, **kwargs):
+    if created:
+        images.acquire(instance.image.name)
+        return
+    previous_image = getattr(instance, "_previous_image", "")
+    if previous_image != instance.image.name:
+        images.acquire(instance.image.name)
+        images.release(previous_image)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_image(sender, instance, **kwargs):
+    images.release(instance.image.name)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        posts = Post.objects.filter(pk=instance.post_id)
+        counters.change(posts, "comments_count", 1)
+        counters.change_user(instance.author_id, "comments_count", 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    posts = Post.objects.filter(pk=instance.post_id)
+    counters.change(posts, "comments_count", -1)
+    counters.change_user(instance.author_id, "comments_count", -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.author_id, "followers_count", 1)
+        counters.change_user(instance.user_id, "following_count", 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, "followers_count", -1)
+    counters.change_user(instance.user_id, "following_count", -1)
+
+
+@receiver(post_save, sender=Post)
+def deliver_new_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(pre_save, sender=Post)
+def detect_upload(sender, instance, **kwargs):
+    # The file of a new upload is only stored by this save.
+    instance._image_uploaded = (
+        bool(instance.image) and not instance.image._committed
+    )
+
+
+@receiver(post_save, sender=Post)
+def queue_thumbnails(sender, instance, **kwargs):
+    if not instance.image:
+        return
+    if getattr(instance, "_image_uploaded", False):
+        # Thumbnails are queued once the upload is cleaned.
+        uploads.schedule(instance.image.name)
+    else:
+        thumbnails.pregenerate(instance.image)
+
+
+@receiver(post_save, sender=Follow)
+def deliver_followed_author(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill([instance.user_id], instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def withdraw_unfollowed_author(sender, instance, **kwargs):
+    timeline.remove_author(instance.user_id, instance.author_id)
+
+
+@receiver(thumbnails.thumbnail_ready)
+def refresh_cards(sender, source, **kwargs):
+    # Cached cards and pages of the post still show the placeholder.
+    posts = Post.objects.filter(image=source)
+    posts.update(updated=timezone.now())
+    pages = posts.values_list("pk", "author__username", "group__slug")
+    for post_id, username, slug in pages:
+        invalidate_post_pages(post_id, username, [slug])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(thumbnails.thumbnail_ready)
+def invalidate_feeds(sender, **kwargs):
+    bump_version(FEED_NAMESPACE)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    bump_version(post_namespace(instance.post_id))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_pages_of_post(sender, instance, **kwargs):
+    group_ids = {
+        instance.group_id,
+        getattr(instance, "_previous_group_id", None),
+    } - {None}
+    slugs = []
+    if group_ids:
+        slugs = Group.objects.filter(pk__in=group_ids).values_list(
+            "slug", flat=True
+        )
+    invalidate_post_pages(instance.pk, instance.author.username, slugs)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_profiles(sender, instance, **kwargs):
+    bump_version(
+        author_namespace(instance.author.username),
+        author_namespace(instance.user.username),
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    bump_version(group_namespace(instance.slug), NAMES_NAMESPACE)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_names(sender, instance, update_fields=None, **kwargs):
+    # Logging in saves last_login only.
+    if update_fields is None or set(update_fields) != {"last_login"}:
+        bump_version(NAMES_NAMESPACE)
@@ -0,0 +1,39 @@
+from django import template
+from sorl.thumbnail import default
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(image):
+    """
+    The thumbnails of image for a <picture>: the fallback JPEG and, per
+    modern format, a srcset of the variants generated so far. None while
+    the fallback is missing. Missing thumbnails are queued, see
+    thumbnails.PregeneratedBackend.
+    """
+    if not image:
+        return None
+    geometry_string, options = thumbnails.FALLBACK
+    fallback = default.backend.get_thumbnail(image, geometry_string, **options)
+    if fallback is None:
+        return None
+    sources = []
+    for format_ in thumbnails.FORMATS:
+        srcset = []
+        for width, geometry_string, options in thumbnails.variants(format_):
+            variant = default.backend.get_thumbnail(
+                image, geometry_string, **options
+            )
+            if variant is not None:
+                srcset.append(f"{variant.url} {width}w")
+        if srcset:
+            sources.append(
+                {
+                    "type": thumbnails.MIME_TYPES[format_],
+                    "srcset": ", ".join(srcset),
+                }
+            )
+    return {"fallback": fallback, "sources": sources}
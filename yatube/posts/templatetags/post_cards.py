@@ -0,0 +1,17 @@
+from django import template
+
+from posts import dates
+from posts.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    return render_cards(posts)
+
+
+@register.filter
+def relative_date(value):
+    """The date relative to the time of the response, see posts.dates."""
+    return dates.placeholder(value)
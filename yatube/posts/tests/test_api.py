@@ -0,0 +1,149 @@
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from api.serializers import PostSerializer
+
+from .. import timeline
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(
+            title="Котики", slug="cats", description="Про котиков"
+        )
+        cls.empty_group = Group.objects.create(
+            title="Собачки", slug="dogs", description="Про собачек"
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f"Пост {number}", author=cls.user, group=cls.group
+            )
+            for number in range(15)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(post=cls.post, author=cls.reader, text="Ок")
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get(self, name, *args, client=None, **params):
+        client = client or self.client
+        response = client.get(reverse(f"api:{name}", args=args), params)
+        return response, json.loads(response.content)
+
+    def test_posts_are_paginated_by_cursor(self):
+        response, data = self.get("posts")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            [post["id"] for post in data["results"]],
+            [post.id for post in self.posts[::-1][:10]],
+        )
+        self.assertIsNone(data["previous"])
+        _, data = self.get("posts", cursor=data["next"])
+        self.assertEqual(
+            [post["id"] for post in data["results"]],
+            [post.id for post in self.posts[4::-1]],
+        )
+        self.assertIsNone(data["next"])
+
+    def test_fields_select_the_representation(self):
+        _, data = self.get("posts", fields="id,author", limit=1)
+        self.assertEqual(
+            data["results"], [{"id": self.post.id, "author": "John"}]
+        )
+        response, data = self.get("posts", fields="id,secret")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn("secret", data["detail"])
+
+    def test_ids_keep_the_requested_order(self):
+        ids = [self.posts[3].id, self.posts[0].id, 0, self.posts[7].id]
+        _, data = self.get(
+            "posts", ids=",".join(map(str, ids)), fields="id"
+        )
+        self.assertEqual(
+            data["results"], [{"id": pk} for pk in ids if pk]
+        )
+        response, _ = self.get("posts", ids="1,x")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_reads_take_a_single_query(self):
+        for name, args in (
+            ("posts", ()),
+            ("post", (self.post.id,)),
+            ("comments", (self.post.id,)),
+            ("groups", ()),
+            ("profile", ("John",)),
+        ):
+            with self.subTest(endpoint=name):
+                cache.clear()
+                # The detail adds its comments, comments look up the post.
+                queries = 2 if name in ("post", "comments") else 1
+                with self.assertNumQueries(queries):
+                    self.get(name, *args)
+
+    def test_payload_is_smaller_than_the_page(self):
+        page = self.client.get(reverse("posts:index"))
+        response, _ = self.get("posts")
+        self.assertLess(len(response.content), len(page.content) / 2)
+
+    def test_unchanged_resources_are_not_modified(self):
+        url = reverse("api:post", args=(self.post.id,))
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Comment.objects.create(post=self.post, author=self.user, text="Да")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            len(json.loads(response.content)["comments"]["results"]), 2
+        )
+
+    def test_groups_newest_first(self):
+        _, data = self.get("groups", fields="slug,posts_count", limit=1)
+        self.assertEqual(
+            data["results"], [{"slug": "dogs", "posts_count": 0}]
+        )
+        # A new post does not move the groups between pages.
+        Post.objects.create(text="Ещё", author=self.user, group=self.group)
+        _, data = self.get("groups", fields="slug", cursor=data["next"])
+        self.assertEqual(data["results"], [{"slug": "cats"}])
+
+    def test_follow_cursor_is_loaded_with_the_entries(self):
+        queryset = PostSerializer(["id"]).prepare(
+            timeline.feed(self.reader), "post__", timeline.KEYSET
+        )
+        entries = list(queryset[:2])
+        with self.assertNumQueries(0):
+            for entry in entries:
+                entry.pub_date, entry.post_id
+
+    def test_profile_counters(self):
+        _, data = self.get("profile", "John")
+        self.assertEqual(data["posts_count"], 15)
+        self.assertEqual(data["followers_count"], 1)
+
+    def test_follow_requires_login(self):
+        response, data = self.get("follow")
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        _, data = self.get("follow", client=self.reader_client, fields="id")
+        newest = self.posts[::-1][:10]
+        self.assertEqual(
+            data["results"], [{"id": post.id} for post in newest]
+        )
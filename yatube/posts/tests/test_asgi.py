@@ -0,0 +1,176 @@
+import asyncio
+import json
+import threading
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.asgi import ASGIHandler, wsgi_environ
+
+from ..models import Post
+
+User = get_user_model()
+
+
+def scope(path, method="GET", headers=()):
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+
+def call(application, scope, *messages):
+    """Run application on scope, return the messages it sent."""
+    received = list(messages) or [{"type": "http.request"}]
+    sent = []
+
+    async def receive():
+        if received:
+            return received.pop(0)
+        # Nothing more from the client.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class ASGIHandlerTests(TransactionTestCase):
+    def setUp(self) -> None:
+        self.application = ASGIHandler(WSGIHandler(), threads=2)
+        self.user = User.objects.create_user(username="John")
+        Post.objects.create(text="Пост про котиков", author=self.user)
+
+    def tearDown(self) -> None:
+        self.application.executor.shutdown()
+
+    def test_page(self):
+        start, body = call(self.application, scope(reverse("posts:index")))
+        self.assertEqual(start["type"], "http.response.start")
+        self.assertEqual(start["status"], 200)
+        self.assertIn(
+            (b"content-type", b"text/html; charset=utf-8"), start["headers"]
+        )
+        self.assertIn("Пост про котиков", body["body"].decode())
+        self.assertFalse(body.get("more_body", False))
+
+    def test_streaming_response(self):
+        sent = call(self.application, scope(reverse("posts:index_feed")))
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertTrue(all(message["more_body"] for message in sent[1:-1]))
+        self.assertEqual(sent[-1], {"type": "http.response.body"})
+        feed = b"".join(message.get("body", b"") for message in sent[1:])
+        self.assertIn("Пост про котиков", feed.decode())
+
+    def test_client_left_before_sending_body(self):
+        sent = call(
+            self.application,
+            scope(reverse("users:login"), method="POST"),
+            {"type": "http.request", "body": b"user", "more_body": True},
+            {"type": "http.disconnect"},
+        )
+        self.assertEqual(sent, [])
+
+    def test_lifespan(self):
+        sent = call(
+            self.application,
+            {"type": "lifespan"},
+            {"type": "lifespan.startup"},
+            {"type": "lifespan.shutdown"},
+        )
+        self.assertEqual(
+            [message["type"] for message in sent],
+            ["lifespan.startup.complete", "lifespan.shutdown.complete"],
+        )
+
+
+class WSGIEnvironTests(SimpleTestCase):
+    def test_body_and_headers(self):
+        application = ASGIHandler(WSGIHandler(), threads=1)
+        received = [
+            {"type": "http.request", "body": b"text=", "more_body": True},
+            {"type": "http.request", "body": b"hello"},
+        ]
+
+        async def receive():
+            return received.pop(0)
+
+        body = asyncio.run(application.read_body(receive))
+        application.executor.shutdown()
+        environ = wsgi_environ(
+            scope(
+                "/путь/",
+                method="POST",
+                headers=[
+                    (b"content-type", b"application/x-www-form-urlencoded"),
+                    (b"accept", b"text/html"),
+                    (b"accept", b"*/*"),
+                    (b"cookie", b"sessionid=abc"),
+                    (b"cookie", b"csrftoken=def"),
+                ],
+            ),
+            body,
+        )
+        self.assertEqual(environ["wsgi.input"].read(), b"text=hello")
+        self.assertEqual(
+            environ["CONTENT_TYPE"], "application/x-www-form-urlencoded"
+        )
+        self.assertEqual(environ["HTTP_ACCEPT"], "text/html,*/*")
+        self.assertEqual(
+            environ["HTTP_COOKIE"], "sessionid=abc; csrftoken=def"
+        )
+        self.assertEqual(
+            environ["PATH_INFO"].encode("latin-1").decode(), "/путь/"
+        )
+
+
+class BenchServersTests(SimpleTestCase):
+    def test_report(self):
+        async def serve(reader, writer):
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+            writer.close()
+
+        async def start():
+            server = await asyncio.start_server(serve, "127.0.0.1", 0)
+            return server.sockets[0].getsockname()[1]
+
+        loop = asyncio.new_event_loop()
+        port = loop.run_until_complete(start())
+        url = f"http://127.0.0.1:{port}"
+        out = StringIO()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+        try:
+            call_command(
+                "bench_servers",
+                asgi=url,
+                slow=2,
+                interval=0.01,
+                concurrency=2,
+                duration=0.2,
+                stdout=out,
+            )
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        report = json.loads(out.getvalue())
+        self.assertEqual(list(report["servers"]), ["asgi"])
+        self.assertEqual(report["servers"]["asgi"]["errors"], 0)
+        self.assertGreater(report["servers"]["asgi"]["requests"], 0)
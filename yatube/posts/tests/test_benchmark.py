@@ -0,0 +1,40 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.benchmark import percentile, summarize
+
+from ..models import Follow, Post, UserStats
+
+
+class BenchmarkTests(TestCase):
+    def test_percentiles(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(summarize([0.001, 0.003], 2)["p50_ms"], 1.0)
+
+    def test_seed_and_bench(self):
+        call_command(
+            "seed_data",
+            users=10,
+            groups=2,
+            posts=30,
+            comments=20,
+            images=0,
+            stdout=mock.Mock(),
+        )
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(
+            sum(UserStats.objects.values_list("posts_count", flat=True)), 30
+        )
+        out = StringIO()
+        call_command("bench", requests=20, warmup=2, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["total"]["requests"], 20)
+        self.assertEqual(report["total"]["errors"], 0)
+        self.assertIn("p95_ms", report["views"]["index"])
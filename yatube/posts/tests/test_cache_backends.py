@@ -0,0 +1,95 @@
+import json
+import multiprocessing
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.cache_backends import SQLiteCache
+
+
+def increment(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr("counter")
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = f"{self.directory}/cache.sqlite3"
+        self.cache = SQLiteCache(self.location, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_round_trip(self):
+        values = {"int": 1, "bool": True, "text": "пост", "tuple": ("a", 2)}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(list(values) + ["x"]), values)
+        self.assertIs(self.cache.get("bool"), True)
+        self.cache.delete("int")
+        self.assertIsNone(self.cache.get("int"))
+        self.assertEqual(self.cache.get("int", "default"), "default")
+
+    def test_expiry(self):
+        self.cache.set("key", "value", 0.05)
+        self.assertTrue(self.cache.has_key("key"))
+        time.sleep(0.1)
+        self.assertFalse(self.cache.has_key("key"))
+        self.assertTrue(self.cache.add("key", "new"))
+        self.assertFalse(self.cache.add("key", "newer"))
+        self.assertEqual(self.cache.get("key"), "new")
+
+    def test_incr(self):
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+        self.cache.set("counter", 1, None)
+        self.assertEqual(self.cache.incr("counter", 5), 6)
+        self.assertEqual(self.cache.decr("counter"), 5)
+
+    def test_shared_between_processes(self):
+        self.cache.set("counter", 0)
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=increment, args=(self.location, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get("counter"), 200)
+
+    def test_least_recently_used_are_culled(self):
+        cache = SQLiteCache(
+            self.location,
+            {"OPTIONS": {
+                "MAX_ENTRIES": 10,
+                "CULL_FREQUENCY": 2,
+                "CULL_EVERY": 1,
+                "ACCESS_RESOLUTION": 0,
+            }},
+        )
+        for number in range(10):
+            cache.set(number, number)
+        cache.get(0)
+        cache.set("new", "value")
+        self.assertEqual(cache.get(0), 0)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get("new"), "value")
+
+    def test_bench_cache(self):
+        out = StringIO()
+        call_command(
+            "bench_cache", operations=20, keys=10, processes=2, stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            set(report["backends"]), {"locmem", "filebased", "sqlite"}
+        )
+        sqlite = report["backends"]["sqlite"]
+        self.assertIn("p50_ms", sqlite["operations"]["incr"])
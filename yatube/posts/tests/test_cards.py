@@ -0,0 +1,111 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import cards, dates, thumbnails
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.group = Group.objects.create(
+            title="Котики", slug="cats", description="Про котиков"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text="Первый пост", author=self.user, group=self.group
+        )
+
+    def fetch(self):
+        return Post.objects.select_related("author", "group").get(
+            pk=self.post.pk
+        )
+
+    def test_cached_cards_are_not_rendered_again(self):
+        first = cards.render_cards([self.fetch()])
+        with mock.patch.object(cards, "render_card") as render_card:
+            second = cards.render_cards([self.fetch()])
+        render_card.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_feed_page_is_one_cache_lookup(self):
+        Post.objects.create(text="Второй пост", author=self.user)
+        posts = list(Post.objects.select_related("author", "group"))
+        cards.render_cards(posts)
+        with mock.patch.object(
+            cards.cache, "get_many", wraps=cards.cache.get_many
+        ) as get_many, mock.patch.object(
+            cards.cache, "set_many"
+        ) as set_many:
+            cards.render_cards(posts)
+        self.assertEqual(get_many.call_count, 1)
+        set_many.assert_not_called()
+
+    def test_edited_post_gets_a_new_card(self):
+        cards.render_cards([self.fetch()])
+        self.post.text = "Исправленный пост"
+        self.post.save()
+        (card,) = cards.render_cards([self.fetch()])
+        self.assertIn("Исправленный пост", card)
+
+    def test_renamed_group_gets_a_new_card(self):
+        cards.render_cards([self.fetch()])
+        Group.objects.filter(pk=self.group.pk).update(title="Собачки")
+        (card,) = cards.render_cards([self.fetch()])
+        self.assertIn("Собачки", card)
+
+    def test_date_is_relative_to_the_response(self):
+        date = timezone.now() - timedelta(days=3)
+        (card,) = cards.render_cards([self.fetch()])
+        self.assertIn(dates.PREFIX, card)
+        self.assertEqual(
+            dates.fill(f"<h6>{dates.placeholder(date)}</h6>"),
+            "<h6>3\xa0дня назад</h6>",
+        )
+
+    def test_cached_pages_show_dates_of_the_response(self):
+        for name in ("posts:index", "posts:index_more", "posts:search"):
+            with self.subTest(name=name):
+                url = reverse(name)
+                # Caches the cards and the page.
+                Client().get(url, {"q": "пост"})
+                with mock.patch.object(
+                    dates, "naturaltime", return_value="только что"
+                ):
+                    response = Client().get(url, {"q": "пост"})
+                self.assertContains(response, "только что")
+                self.assertNotContains(response, dates.PREFIX)
+
+    def test_ready_thumbnail_refreshes_cards(self):
+        Post.objects.filter(pk=self.post.pk).update(image="posts/cat.gif")
+        updated = self.fetch().updated
+        thumbnails.thumbnail_ready.send(
+            sender=thumbnails.PregeneratedBackend,
+            name="cache/cat.gif",
+            source="posts/cat.gif",
+        )
+        self.assertGreater(self.fetch().updated, updated)
+
+    def test_feeds_show_cards(self):
+        pages = (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.user.username,)),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertContains(response, "Первый пост")
+                self.assertContains(response, "Котики")
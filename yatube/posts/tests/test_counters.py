@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.reader = User.objects.create_user(username="Bobik")
+        cls.group = Group.objects.create(
+            title="Group title",
+            description="Group description",
+            slug="test-slug",
+        )
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counters(self):
+        post = Post.objects.create(
+            text="text", author=self.user, group=self.group
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        post.group = None
+        post.save()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.user).posts_count, 0)
+
+    def test_comment_counters(self):
+        post = Post.objects.create(text="text", author=self.user)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text="comment"
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.stats(self.reader).comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(self.stats(self.user).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        Follow.objects.all().delete()
+        self.assertEqual(self.stats(self.user).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_reconcile_command_repairs_drift(self):
+        Post.objects.bulk_create(
+            Post(text="text", author=self.user, group=self.group)
+            for _ in range(3)
+        )
+        UserStats.objects.filter(user=self.reader).delete()
+        call_command("reconcile_counters", stdout=mock.Mock())
+        self.group.refresh_from_db()
+        self.assertEqual(self.stats(self.user).posts_count, 3)
+        self.assertEqual(self.group.posts_count, 3)
+        self.assertEqual(self.stats(self.reader).posts_count, 0)
+
+    def test_post_detail_uses_stored_counters(self):
+        post = Post.objects.create(text="text", author=self.user)
+        Comment.objects.create(post=post, author=self.reader, text="comment")
+        url = reverse("posts:post_detail", kwargs={"post_id": post.id})
+        cache.clear()
+        # post with author stats and group, then the comments list
+        with self.assertNumQueries(2):
+            response = Client().get(url)
+        self.assertContains(response, "Комментарии (1)")
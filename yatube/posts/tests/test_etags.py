@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(
+            title="Котики", slug="cats", description="Про котиков"
+        )
+        cls.other_group = Group.objects.create(
+            title="Собачки", slug="dogs", description="Про собачек"
+        )
+        cls.post = Post.objects.create(
+            text="text", author=cls.user, group=cls.group
+        )
+        cls.urls = {
+            "post_detail": reverse("posts:post_detail", args=(cls.post.id,)),
+            "profile": reverse("posts:profile", args=(cls.user.username,)),
+            "group_list": reverse("posts:group_list", args=(cls.group.slug,)),
+        }
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def etag(self, url, client=None):
+        client = client or self.client
+        client.get(url)
+        # The first render of a post page remembers what its ETag needs.
+        return client.get(url)["ETag"]
+
+    def assertNotModified(self, url, etag, client=None):
+        client = client or self.client
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def assertModified(self, url, etag, client=None):
+        client = client or self.client
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_unchanged_pages_are_not_rendered(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.etag(url)
+                with self.assertNumQueries(0):
+                    self.assertNotModified(url, etag)
+
+    def test_etag_depends_on_the_user(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.etag(url, self.reader_client)
+                self.assertNotModified(url, etag, self.reader_client)
+                self.assertModified(url, etag)
+
+    def test_comment_changes_post_page(self):
+        url = self.urls["post_detail"]
+        etag = self.etag(url)
+        Comment.objects.create(post=self.post, author=self.reader, text="!")
+        self.assertModified(url, etag)
+
+    def test_new_post_changes_its_author_and_group(self):
+        etags = {name: self.etag(url) for name, url in self.urls.items()}
+        other = {
+            "other_group": reverse(
+                "posts:group_list", args=(self.other_group.slug,)
+            )
+        }
+        etags["other_group"] = self.etag(other["other_group"])
+        Post.objects.create(text="new", author=self.user, group=self.group)
+        self.assertModified(self.urls["profile"], etags["profile"])
+        self.assertModified(self.urls["group_list"], etags["group_list"])
+        # The post page shows how many posts its author has.
+        self.assertModified(self.urls["post_detail"], etags["post_detail"])
+        self.assertNotModified(other["other_group"], etags["other_group"])
+
+    def test_follow_changes_profile(self):
+        url = self.urls["profile"]
+        etag = self.etag(url, self.reader_client)
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertModified(url, etag, self.reader_client)
+
+    def test_renaming_a_user_changes_pages(self):
+        url = self.urls["group_list"]
+        etag = self.etag(url)
+        self.user.first_name = "Джон"
+        self.user.save()
+        self.assertModified(url, etag)
+
+    def test_login_does_not_change_pages(self):
+        url = self.urls["group_list"]
+        etag = self.etag(url)
+        self.client.force_login(self.user)
+        self.client.logout()
+        self.assertNotModified(url, etag)
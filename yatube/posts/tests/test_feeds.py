@@ -0,0 +1,134 @@
+from http import HTTPStatus
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import feeds
+from ..models import Group, Post
+
+User = get_user_model()
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+class AtomFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username="John", first_name="Джон", last_name="Смит"
+        )
+        cls.group = Group.objects.create(
+            title="Котики", slug="cats", description="Про котиков"
+        )
+        cls.post = Post.objects.create(
+            text="Пост про котиков", author=cls.user, group=cls.group
+        )
+        Post.objects.create(text="Пост без группы", author=cls.user)
+        cls.urls = {
+            "index": reverse("posts:index_feed"),
+            "group": reverse("posts:group_feed", args=("cats",)),
+            "profile": reverse("posts:profile_feed", args=("John",)),
+        }
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    def parse(self, response):
+        return ElementTree.fromstring(b"".join(response.streaming_content))
+
+    def test_feeds_list_the_newest_posts(self):
+        expected = {
+            "index": ["<p>Пост без группы</p>", "<p>Пост про котиков</p>"],
+            "group": ["<p>Пост про котиков</p>"],
+            "profile": ["<p>Пост без группы</p>", "<p>Пост про котиков</p>"],
+        }
+        for name, url in self.urls.items():
+            with self.subTest(feed=name):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                self.assertEqual(
+                    response["Content-Type"],
+                    "application/atom+xml; charset=utf-8",
+                )
+                feed = self.parse(response)
+                self.assertEqual(
+                    [
+                        entry.find(f"{ATOM}summary").text
+                        for entry in feed.iter(f"{ATOM}entry")
+                    ],
+                    expected[name],
+                )
+
+    def test_summary_escapes_the_text(self):
+        Post.objects.create(
+            text="<img src=x onerror=alert(1)>\nвторая строка",
+            author=self.user,
+        )
+        feed = self.parse(self.client.get(self.urls["index"]))
+        summary = next(feed.iter(f"{ATOM}summary")).text
+        self.assertEqual(
+            summary,
+            "<p>&lt;img src=x onerror=alert(1)&gt;<br>вторая строка</p>",
+        )
+
+    def test_entry_shows_author_and_group(self):
+        feed = self.parse(self.client.get(self.urls["group"]))
+        (entry,) = feed.iter(f"{ATOM}entry")
+        self.assertEqual(
+            entry.find(f"{ATOM}author/{ATOM}name").text, "Джон Смит"
+        )
+        self.assertEqual(
+            entry.find(f"{ATOM}category").get("term"), "Котики"
+        )
+        self.assertEqual(
+            entry.find(f"{ATOM}id").text,
+            "http://testserver"
+            + reverse("posts:post_detail", args=(self.post.pk,)),
+        )
+
+    def test_unchanged_feeds_are_not_modified(self):
+        for name, url in self.urls.items():
+            with self.subTest(feed=name):
+                etag = self.client.get(url)["ETag"]
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                Post.objects.create(
+                    text="Новый пост", author=self.user, group=self.group
+                )
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_entries_are_serialized_once(self):
+        self.parse(self.client.get(self.urls["index"]))
+        with mock.patch.object(feeds, "serialize") as serialize:
+            self.parse(self.client.get(self.urls["index"]))
+        serialize.assert_not_called()
+        self.post.text = "Исправленный пост"
+        self.post.save()
+        feed = self.parse(self.client.get(self.urls["index"]))
+        summaries = [
+            entry.find(f"{ATOM}summary").text
+            for entry in feed.iter(f"{ATOM}entry")
+        ]
+        self.assertIn("<p>Исправленный пост</p>", summaries)
+
+    def test_pages_link_their_feeds(self):
+        pages = {
+            "index": reverse("posts:index"),
+            "group": reverse("posts:group_list", args=("cats",)),
+            "profile": reverse("posts:profile", args=("John",)),
+        }
+        for name, url in pages.items():
+            with self.subTest(page=name):
+                self.assertContains(
+                    self.client.get(url), f'href="{self.urls[name]}"'
+                )
@@ -0,0 +1,170 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default
+
+from core.storage import ContentAddressedStorage
+
+from .. import images, thumbnails
+from ..models import Post, StoredImage
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+OTHER_GIF = SMALL_GIF[:-3] + b"\x0B\x00\x3B"
+
+
+def upload(name, content=SMALL_GIF):
+    return SimpleUploadedFile(name, content, content_type="image/gif")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def post(self, image):
+        return Post.objects.create(text="text", author=self.user, image=image)
+
+    def files(self):
+        return sorted(
+            os.path.relpath(os.path.join(path, name), TEMP_MEDIA_ROOT)
+            for path, _, names in os.walk(TEMP_MEDIA_ROOT)
+            for name in names
+            if "cache" not in path
+        )
+
+    def references(self, post):
+        return StoredImage.objects.get(name=post.image.name).references
+
+    def test_upload_is_stored_by_content(self):
+        storage = ContentAddressedStorage(location=TEMP_MEDIA_ROOT)
+        name = storage.save("posts/Cat.GIF", ContentFile(SMALL_GIF))
+        self.assertRegex(name, r"^posts/[0-9a-f]{2}/[0-9a-f]{64}\.gif$")
+        self.assertEqual(name.split("/")[1], name.split("/")[2][:2])
+        self.assertEqual(storage.open(name).read(), SMALL_GIF)
+        self.assertEqual(
+            storage.save("posts/other.gif", ContentFile(SMALL_GIF)), name
+        )
+        self.assertNotEqual(
+            storage.save("posts/cat.gif", ContentFile(OTHER_GIF)), name
+        )
+        self.assertEqual(len(self.files()), 2)
+
+    def test_stored_name_is_kept(self):
+        storage = ContentAddressedStorage(location=TEMP_MEDIA_ROOT)
+        name = storage.save("posts/cat.gif", ContentFile(SMALL_GIF))
+        self.assertEqual(storage.save(name, ContentFile(SMALL_GIF)), name)
+        # Other content stored under a stored name, e.g. a cleaned upload.
+        other = storage.save(name, ContentFile(OTHER_GIF))
+        self.assertRegex(other, r"^posts/[0-9a-f]{2}/[0-9a-f]{64}\.gif$")
+
+    def test_identical_uploads_share_file_and_thumbnails(self):
+        first = self.post(upload("cat.gif"))
+        second = self.post(upload("meme.gif"))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(self.files(), [first.image.name])
+        self.assertEqual(self.references(first), 2)
+        geometry_string, options = thumbnails.SIZES[0]
+        thumbnail_names = {
+            default.backend.resolve(post.image, geometry_string, **options)[
+                1
+            ].name
+            for post in (first, second)
+        }
+        self.assertEqual(len(thumbnail_names), 1)
+
+    def test_last_post_removes_file_and_thumbnails(self):
+        first = self.post(upload("cat.gif"))
+        second = self.post(upload("meme.gif"))
+        geometry_string, options = thumbnails.SIZES[0]
+        _, thumbnail, _ = default.backend.resolve(
+            first.image, geometry_string, **options
+        )
+        default.storage.save(thumbnail.name, ContentFile(SMALL_GIF))
+        first.delete()
+        self.assertEqual(self.references(second), 1)
+        self.assertTrue(thumbnail.exists())
+        second.delete()
+        self.assertEqual(self.files(), [])
+        self.assertFalse(thumbnail.exists())
+        self.assertFalse(StoredImage.objects.exists())
+
+    def test_seeded_images_are_counted(self):
+        call_command(
+            "seed_data",
+            users=3,
+            groups=1,
+            posts=4,
+            comments=0,
+            images=1,
+            stdout=StringIO(),
+        )
+        for post in Post.objects.all():
+            with self.subTest(post=post.pk):
+                self.assertEqual(self.references(post), 1)
+        images.acquire_all([post.image.name] * 2)
+        self.assertEqual(self.references(post), 3)
+        StoredImage.objects.filter(name=post.image.name).update(references=1)
+        Post.objects.all().delete()
+        self.assertEqual(self.files(), [])
+
+    def test_replaced_image_is_released(self):
+        post = self.post(upload("cat.gif"))
+        old = post.image.name
+        post.image = upload("dog.gif", OTHER_GIF)
+        post.save()
+        self.assertEqual(self.files(), [post.image.name])
+        self.assertFalse(StoredImage.objects.filter(name=old).exists())
+        post.image = None
+        post.save()
+        self.assertEqual(self.files(), [])
+
+    def test_dedupe_moves_legacy_files(self):
+        legacy = FileSystemStorage(location=TEMP_MEDIA_ROOT)
+        names = [
+            legacy.save(name, ContentFile(SMALL_GIF))
+            for name in ("posts/cat.gif", "posts/meme.gif")
+        ]
+        posts = [self.post(name) for name in names]
+        legacy.save("posts/orphan.gif", ContentFile(OTHER_GIF))
+        out = StringIO()
+        call_command("dedupe_images", "--prune", stdout=out)
+        self.assertIn("Moved 2 images", out.getvalue())
+        (stored,) = self.files()
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(post.image.name, stored)
+        self.assertEqual(self.references(posts[0]), 2)
+        self.assertEqual(images.storage().open(stored).read(), SMALL_GIF)
+        out = StringIO()
+        call_command("dedupe_images", stdout=out)
+        self.assertIn("Moved 0 images", out.getvalue())
+        self.assertEqual(self.files(), [stored])
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(post.image.name, stored)
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import queue
+import shutil
+import socket
+import tempfile
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.template.loader import render_to_string
+from django.test import (
+    Client,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from core.asgi import ASGIHandler
+from core.pubsub import Hub, hub
+
+from .. import live
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class HubTests(SimpleTestCase):
+    def test_publish_in_process(self):
+        local = Hub()
+        first = local.subscribe("comments:1")
+        second = local.subscribe("comments:1")
+        other = local.subscribe("comments:2")
+        local.publish("comments:1", b"event")
+        self.assertEqual(first.get(1), b"event")
+        self.assertEqual(second.get(1), b"event")
+        with self.assertRaises(queue.Empty):
+            other.get(0)
+        for subscription in (first, second, other):
+            subscription.close()
+        self.assertEqual(local.subscribers("comments:1"), 0)
+
+    def test_publish_between_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        # A socket left behind by a process that died.
+        dead = os.path.join(directory, "1-dead.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as closed:
+            closed.bind(dead)
+        reader, writer = Hub(directory), Hub(directory)
+        subscription = reader.subscribe("comments:1")
+        self.addCleanup(reader.close)
+        writer.publish("comments:1", b"event")
+        self.assertEqual(subscription.get(5), b"event")
+        self.assertFalse(os.path.exists(dead))
+
+    def test_wait_on_loop(self):
+        local = Hub()
+        subscription = local.subscribe("comments:1")
+
+        async def wait():
+            loop = asyncio.get_running_loop()
+            loop.call_later(
+                0.01, local.publish, "comments:1", b"from a thread"
+            )
+            return await subscription.wait(5)
+
+        self.assertEqual(asyncio.run(wait()), b"from a thread")
+
+
+@override_settings(
+    LIVE_COMMENTS=True, EVENT_STREAM_TIMEOUT=0.1, EVENT_STREAM_HEARTBEAT=0.05
+)
+class CommentEventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.post = Post.objects.create(text="Пост", author=cls.user)
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.user, text="Первый комментарий"
+        )
+        cls.url = reverse("posts:comment_events", args=(cls.post.pk,))
+
+    def read(self, response):
+        content = b"".join(response.streaming_content).decode()
+        response.close()
+        return content
+
+    def test_page_links_the_stream(self):
+        response = self.client.get(
+            reverse("posts:post_detail", args=(self.post.pk,))
+        )
+        self.assertContains(
+            response, f"{self.url}?after={self.comment.pk}"
+        )
+        self.assertContains(response, f'id="comment-{self.comment.pk}"')
+
+    def test_comments_after_the_page(self):
+        response = self.client.get(self.url, {"after": 0})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        content = self.read(response)
+        self.assertIn(f"id: {self.comment.pk}\nevent: comment\n", content)
+        self.assertIn("Первый комментарий", content)
+        self.assertIn(": ping", content)
+        self.assertEqual(hub.subscribers(live.channel(self.post.pk)), 0)
+
+    def test_reconnect_skips_comments_seen(self):
+        response = self.client.get(
+            self.url, HTTP_LAST_EVENT_ID=str(self.comment.pk)
+        )
+        self.assertNotIn("event: comment", self.read(response))
+
+    def test_off_by_default(self):
+        with self.settings(LIVE_COMMENTS=False):
+            response = self.client.get(
+                reverse("posts:post_detail", args=(self.post.pk,))
+            )
+            self.assertNotContains(response, "data-comment-events")
+            self.assertNotContains(response, "live_comments.js")
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_missing_post(self):
+        response = self.client.get(
+            reverse("posts:comment_events", args=(self.post.pk + 1,))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+@override_settings(LIVE_COMMENTS=True)
+class LiveCommentsTests(TransactionTestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="John")
+        self.post = Post.objects.create(text="Пост", author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.comment_url = reverse("posts:add_comment", args=(self.post.pk,))
+
+    def test_one_render_for_all_readers(self):
+        subscriptions = [
+            hub.subscribe(live.channel(self.post.pk)) for _ in range(3)
+        ]
+        with mock.patch(
+            "posts.live.render_to_string", wraps=render_to_string
+        ) as render:
+            self.client.post(self.comment_url, {"text": "Новый комментарий"})
+        self.assertEqual(render.call_count, 1)
+        events = {subscription.get(1) for subscription in subscriptions}
+        self.assertEqual(len(events), 1)
+        self.assertIn("Новый комментарий", events.pop().decode())
+        for subscription in subscriptions:
+            subscription.close()
+
+    def test_stream_over_asgi(self):
+        application = ASGIHandler(WSGIHandler(), threads=2)
+        self.addCleanup(application.executor.shutdown)
+        path = reverse("posts:comment_events", args=(self.post.pk,))
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"after=0",
+            "headers": [(b"host", b"testserver")],
+        }
+
+        async def read():
+            sent = asyncio.Queue()
+            disconnected = asyncio.Event()
+            requests = [{"type": "http.request"}]
+
+            async def receive():
+                if requests:
+                    return requests.pop()
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            serving = asyncio.ensure_future(
+                application(scope, receive, sent.put)
+            )
+            start = await asyncio.wait_for(sent.get(), 5)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None,
+                lambda: self.client.post(
+                    self.comment_url, {"text": "Живой комментарий"}
+                ),
+            )
+            event = await asyncio.wait_for(sent.get(), 5)
+            disconnected.set()
+            await asyncio.wait_for(serving, 5)
+            return start, event
+
+        start, event = asyncio.run(read())
+        self.assertEqual(start["status"], HTTPStatus.OK)
+        self.assertIn("Живой комментарий", event["body"].decode())
+        self.assertTrue(event["more_body"])
+        self.assertEqual(hub.subscribers(live.channel(self.post.pk)), 0)
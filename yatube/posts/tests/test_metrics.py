@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+
+from ..models import Post
+
+User = get_user_model()
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.post = Post.objects.create(text="text", author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for metric in metrics.REGISTRY:
+            metric.clear()
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("h", "Help.", (1, 5))
+        for value in (0, 3, 3, 7):
+            histogram.observe(value, view="v")
+        self.assertEqual(
+            list(histogram.expose())[2:],
+            [
+                'h_bucket{view="v",le="1"} 1',
+                'h_bucket{view="v",le="5"} 3',
+                'h_bucket{view="v",le="+Inf"} 4',
+                'h_sum{view="v"} 13',
+                'h_count{view="v"} 4',
+            ],
+        )
+
+    def test_requests_are_measured_by_url_name(self):
+        client = Client()
+        client.get(reverse("posts:index"))
+        client.get(reverse("posts:post_detail", args=(self.post.id,)))
+        client.get("/missing/")
+        response = client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(
+            response["Content-Type"],
+            "text/plain; version=0.0.4; charset=utf-8",
+        )
+        text = response.content.decode()
+        for line in (
+            'yatube_requests_total{status="200",view="posts:index"} 1',
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            'yatube_db_queries_count{view="posts:post_detail"} 1',
+            'yatube_requests_total{status="404",view="<unresolved>"} 1',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, text)
+
+    def test_queries_and_rendering_are_counted(self):
+        Client().get(reverse("posts:post_detail", args=(self.post.id,)))
+        measured = {
+            metric.name: dict(metric._series)[(("view", "posts:post_detail"),)]
+            for metric in (metrics.QUERIES, metrics.RENDER_TIME)
+        }
+        # The post only: without comments the list is not queried.
+        self.assertEqual(measured["yatube_db_queries"][-1], 1)
+        self.assertGreater(measured["yatube_template_render_seconds"][-1], 0)
+
+    def test_metrics_are_restricted(self):
+        url = reverse("metrics")
+        # Proxied requests come from the loopback address.
+        response = Client(REMOTE_ADDR="127.0.0.1").get(url)
+        self.assertEqual(response.status_code, 403)
+        response = Client().get(url, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 403)
+        with self.settings(METRICS_TOKEN=None):
+            response = Client().get(url, HTTP_AUTHORIZATION="Bearer None")
+        self.assertEqual(response.status_code, 403)
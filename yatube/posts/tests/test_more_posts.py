@@ -0,0 +1,92 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+MARKER = re.compile(r'data-more="([^"]+)"')
+
+
+class MorePostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(
+            title="Котики", slug="cats", description="Про котиков"
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f"Пост номер {number}",
+                author=cls.user,
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(15)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def more_url(self, response):
+        match = MARKER.search(response.content.decode())
+        return match and match.group(1).replace("&amp;", "&")
+
+    def texts(self, response):
+        return re.findall(r"Пост номер \d+", response.content.decode())
+
+    def test_pages_link_their_next_batch(self):
+        pages = {
+            "posts:index": (),
+            "posts:profile": ("John",),
+            "posts:follow_index": (),
+        }
+        for name, args in pages.items():
+            with self.subTest(page=name):
+                response = self.reader_client.get(reverse(name, args=args))
+                url = self.more_url(response)
+                self.assertIsNotNone(url)
+                batch = self.reader_client.get(url)
+                self.assertNotContains(batch, "<html")
+                self.assertNotContains(batch, "footer")
+                self.assertTrue(self.texts(batch))
+                self.assertFalse(
+                    set(self.texts(batch)) & set(self.texts(response))
+                )
+
+    def test_batches_continue_until_the_end(self):
+        first = self.client.get(reverse("posts:index"))
+        batch = self.client.get(self.more_url(first))
+        expected = [f"Пост номер {number}" for number in range(4, -1, -1)]
+        self.assertEqual(self.texts(batch), expected)
+        self.assertIsNone(self.more_url(batch))
+
+    def test_group_batch_shows_the_group_only(self):
+        first = self.client.get(reverse("posts:group_list", args=("cats",)))
+        self.assertIsNone(self.more_url(first))
+        url = reverse("posts:group_more", args=("cats",))
+        self.assertEqual(len(self.texts(self.client.get(url))), 7)
+
+    def test_anonymous_batches_are_cached_per_cursor(self):
+        first = self.client.get(reverse("posts:index"))
+        url = self.more_url(first)
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(len(self.texts(cached)), 5)
+        self.posts[0].text = "Пост номер 100"
+        self.posts[0].save()
+        self.assertContains(self.client.get(url), "Пост номер 100")
+
+    def test_follow_batch_requires_login(self):
+        response = self.client.get(reverse("posts:follow_more"))
+        self.assertEqual(response.status_code, 302)
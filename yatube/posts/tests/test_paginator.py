@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.paginator import CursorPaginator, decode_cursor, encode_cursor
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.group = Group.objects.create(
+            title="Group title",
+            description="Group description",
+            slug="test-slug",
+        )
+        Post.objects.bulk_create(
+            Post(text=f"Entry {i}", author=cls.user, group=cls.group)
+            for i in range(13)
+        )
+        cls.newest_first = list(Post.objects.order_by("-pub_date", "-id"))
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = Client()
+
+    def test_cursor_round_trip(self):
+        post = self.newest_first[0]
+        position = decode_cursor(
+            encode_cursor(post.pub_date, post.pk, backwards=True)
+        )
+        self.assertTrue(position.backwards)
+        self.assertEqual(position.key, post.pub_date)
+        self.assertEqual(position.pk, post.pk)
+
+    def test_pages_follow_cursors(self):
+        """
+        Walking next and previous cursors visits every post exactly once
+        and returns to the first page.
+        """
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.get_page()
+        self.assertEqual(list(first), self.newest_first[:10])
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        second = paginator.get_page(first.paginator.next_cursor)
+        self.assertEqual(list(second), self.newest_first[10:])
+        self.assertTrue(second.has_previous())
+        self.assertFalse(second.has_next())
+
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        back = paginator.get_page(second.paginator.previous_cursor)
+        self.assertEqual(list(back), self.newest_first[:10])
+
+    def test_cursor_page_runs_single_query(self):
+        """No COUNT(*) is issued for a cursor page."""
+        page = CursorPaginator(Post.objects.all(), 10).get_page()
+        cursor = page.paginator.next_cursor
+        with self.assertNumQueries(1):
+            page = CursorPaginator(Post.objects.all(), 10).get_page(cursor)
+            self.assertTrue(page.has_previous())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse("posts:index") + "?cursor=junk")
+        self.assertEqual(
+            list(response.context["page_obj"]), self.newest_first[:10]
+        )
+
+    def test_views_link_next_cursor(self):
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": self.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                page_obj = self.client.get(url).context["page_obj"]
+                cursor = page_obj.paginator.next_cursor
+                response = self.client.get(f"{url}?cursor={cursor}")
+                self.assertEqual(len(response.context["page_obj"]), 3)
+                self.assertContains(response, "?cursor=")
+
+    def test_legacy_page_links_still_work(self):
+        response = self.client.get(reverse("posts:index") + "?page=2")
+        self.assertEqual(
+            list(response.context["page_obj"]), self.newest_first[10:]
+        )
@@ -0,0 +1,84 @@
+import re
+import unittest
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import timeline
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?$")
+TEMP_SORT = "USE TEMP B-TREE FOR"
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "SQLite query plans")
+class FeedQueryPlanTests(TestCase):
+    """
+    Every feed query must be served by an index: no full table scans and
+    no temporary B-tree sorts, on the first and on the following pages.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.reader = User.objects.create_user(username="Bobik")
+        cls.group = Group.objects.create(
+            title="Group title",
+            description="Group description",
+            slug="test-slug",
+        )
+        for i in range(15):
+            cls.post = Post.objects.create(
+                text=f"Entry {i}", author=cls.user, group=cls.group
+            )
+        Comment.objects.create(post=cls.post, author=cls.reader, text="text")
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_indexed(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            page_obj = response.context.get("page_obj")
+            if page_obj is not None and page_obj.paginator.next_cursor:
+                cursor = page_obj.paginator.next_cursor
+                self.client.get(f"{url}?cursor={cursor}")
+        for query in queries.captured_queries:
+            if not query["sql"].startswith("SELECT"):
+                continue
+            for step in self.explain(query["sql"]):
+                with self.subTest(url=url, sql=query["sql"], step=step):
+                    self.assertNotRegex(step, FULL_SCAN)
+                    self.assertNotIn(TEMP_SORT, step)
+
+    def test_feed_views_use_indexes(self):
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": self.user.username}),
+            reverse("posts:post_detail", kwargs={"post_id": self.post.id}),
+            reverse("posts:follow_index"),
+        )
+        for url in urls:
+            self.assert_indexed(url)
+
+    @mock.patch.object(timeline, "CELEBRITY_FOLLOWERS", 1)
+    def test_follow_feed_with_celebrities_uses_indexes(self):
+        self.assert_indexed(reverse("posts:follow_index"))
@@ -0,0 +1,143 @@
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import routers
+from core.cache import CHANGED_KEY, bump_version
+
+from ..models import Post
+from ..signals import FEED_NAMESPACE
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.author = User.objects.create_user(username="Leo")
+        cls.post = Post.objects.create(text="text", author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        # The test database stands in for the replica.
+        patcher = mock.patch.object(
+            routers, "choose_replica", return_value="default"
+        )
+        self.choose_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_read_views_use_replicas(self):
+        pages = (
+            reverse("posts:index"),
+            reverse("posts:profile", args=(self.author.username,)),
+            reverse("posts:post_detail", args=(self.post.id,)),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                self.choose_replica.reset_mock()
+                self.client.get(url)
+                self.choose_replica.assert_called()
+
+    def test_other_views_use_the_primary(self):
+        self.client.get(reverse("posts:create_post"))
+        self.client.post(
+            reverse("posts:add_comment", args=(self.post.id,)),
+            {"text": "comment"},
+        )
+        self.choose_replica.assert_not_called()
+
+    def test_writer_reads_from_the_primary(self):
+        response = self.client.post(
+            reverse("posts:create_post"), {"text": "new post"}
+        )
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        profile = reverse("posts:profile", args=(self.author.username,))
+        self.client.get(profile)
+        self.choose_replica.assert_not_called()
+        Client().get(profile)
+        self.choose_replica.assert_called()
+
+    def test_writes_in_get_requests_pin_the_client(self):
+        response = self.client.get(
+            reverse("posts:profile_follow", args=(self.author.username,))
+        )
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_router(self):
+        router = routers.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), "default")
+        self.assertEqual(router.db_for_write(Post), "default")
+        self.assertFalse(router.allow_migrate("replica", "posts"))
+        self.assertTrue(router.allow_migrate("default", "posts"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+class ReplicaPositionTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_unknown_changes_keep_reads_on_the_primary(self):
+        routers.mark_synced("replica1", time.time() - 1)
+        self.assertIsNone(routers.choose_replica())
+
+    def test_replicas_synced_since_the_last_change_are_read(self):
+        cache.set(CHANGED_KEY, 100)
+        routers.mark_synced("replica1", 90)
+        routers.mark_synced("replica2", 110)
+        self.assertEqual(routers.choose_replica(), "replica2")
+        bump_version(FEED_NAMESPACE)
+        self.assertIsNone(routers.choose_replica())
+        routers.mark_synced("replica1", time.time() + 1)
+        self.assertEqual(routers.choose_replica(), "replica1")
+
+
+class SyncReplicasTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.primary = f"{self.directory}/primary.sqlite3"
+        self.replica = f"{self.directory}/replica.sqlite3"
+
+    def query(self, name, sql):
+        connection = sqlite3.connect(name)
+        try:
+            with connection:
+                return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def test_replicas_are_copies_of_the_primary(self):
+        self.query(self.primary, "CREATE TABLE post (text TEXT)")
+        self.query(self.primary, "INSERT INTO post VALUES ('text')")
+        databases = {
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": self.primary,
+            },
+            "replica": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": self.replica,
+            },
+        }
+        with mock.patch.dict(
+            "django.conf.settings.DATABASES", databases
+        ), override_settings(DATABASE_REPLICAS=["replica"]):
+            call_command("sync_replicas", stdout=mock.Mock())
+        self.assertEqual(
+            self.query(self.replica, "SELECT text FROM post"), [("text",)]
+        )
+        self.assertIsNotNone(cache.get(routers.synced_key("replica")))
@@ -0,0 +1,92 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Post
+
+User = get_user_model()
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "SQLite FTS5")
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="admin"
+        )
+        cls.post = Post.objects.create(
+            text="Лев Толстой написал <Войну и мир>", author=cls.user
+        )
+        cls.other = Post.objects.create(text="Про котиков", author=cls.user)
+
+    def found(self, query):
+        return list(search.search(query))
+
+    def test_index_follows_changes(self):
+        post = Post.objects.create(text="Антон Чехов", author=self.user)
+        self.assertEqual(self.found("чехов"), [post])
+        post.text = "Федор Достоевский"
+        post.save()
+        self.assertEqual(self.found("чехов"), [])
+        self.assertEqual(self.found("достоевский"), [post])
+        post.delete()
+        self.assertEqual(self.found("достоевский"), [])
+
+    def test_bulk_created_posts_are_indexed(self):
+        Post.objects.bulk_create(
+            Post(text=f"Пушкин {i}", author=self.user) for i in range(3)
+        )
+        self.assertEqual(len(self.found("пушкин")), 3)
+
+    def test_last_word_is_a_prefix(self):
+        self.assertEqual(self.found("лев толст"), [self.post])
+        self.assertEqual(self.found("кот"), [self.other])
+
+    def test_operators_are_matched_literally(self):
+        for query in ('"', "NOT", "котиков OR", "*", "лев AND (мир"):
+            with self.subTest(query=query):
+                self.assertIsInstance(self.found(query), list)
+
+    def test_results_are_ranked(self):
+        best = Post.objects.create(
+            text="котики котики котики", author=self.user
+        )
+        self.assertEqual(self.found("котик"), [best, self.other])
+
+    def test_search_page(self):
+        response = Client().get(reverse("posts:search"), {"q": "войну"})
+        self.assertEqual(list(response.context["page_obj"]), [self.post])
+        self.assertContains(response, "<mark>Войну</mark>")
+        self.assertContains(response, "&lt;<mark>Войну</mark>")
+
+    def test_search_page_without_words(self):
+        for query in ("!!!", '"', "*"):
+            with self.subTest(query=query):
+                response = Client().get(reverse("posts:search"), {"q": query})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.context["page_obj"]), [])
+
+    def test_search_page_is_cursor_paginated(self):
+        Post.objects.bulk_create(
+            Post(text=f"Пушкин {i}", author=self.user) for i in range(15)
+        )
+        url = reverse("posts:search")
+        first = Client().get(url, {"q": "пушкин"}).context["page_obj"]
+        cursor = first.paginator.next_cursor
+        second = Client().get(url, {"q": "пушкин", "cursor": cursor})
+        seen = list(first) + list(second.context["page_obj"])
+        self.assertEqual(len(set(seen)), 15)
+
+    def test_admin_uses_index(self):
+        client = Client()
+        client.force_login(self.admin)
+        response = client.get(
+            reverse("admin:posts_post_changelist"), {"q": "толстой"}
+        )
+        self.assertEqual(list(response.context["cl"].result_list), [self.post])
@@ -0,0 +1,51 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase
+
+
+class SQLiteTuningTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_new_connections_are_tuned(self):
+        settings_dict = dict(
+            connection.settings_dict, NAME=f"{self.directory}/db.sqlite3"
+        )
+        wrapper = DatabaseWrapper(settings_dict)
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            # NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS["cache_size"]
+            )
+
+    def test_bench_sqlite(self):
+        out = StringIO()
+        call_command(
+            "bench_sqlite",
+            readers=1,
+            writers=1,
+            duration=0.2,
+            posts=20,
+            stdout=out,
+        )
+        report = json.loads(out.getvalue())
+        for run in ("default", "tuned"):
+            with self.subTest(run=run):
+                self.assertGreater(report["runs"][run]["reads"]["requests"], 0)
+                self.assertGreater(
+                    report["runs"][run]["writes"]["requests"], 0
+                )
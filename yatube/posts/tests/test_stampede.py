@@ -0,0 +1,119 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import metrics, stampede
+
+from ..models import Post
+
+User = get_user_model()
+
+
+def count(metric, **labels):
+    values = metric._series.get(tuple(sorted(labels.items())))
+    return values[0] if values else 0
+
+
+class StampedeTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.post = Post.objects.create(text="Лев Толстой", author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for metric in metrics.REGISTRY:
+            metric.clear()
+        self.compute = mock.Mock(return_value="value")
+
+    def fetch(self, version=None, **kwargs):
+        return stampede.fetch(
+            "test", "key", self.compute, 60, version, **kwargs
+        )
+
+    def test_value_is_computed_once(self):
+        self.assertEqual(self.fetch(), "value")
+        self.assertEqual(self.fetch(), "value")
+        self.compute.assert_called_once()
+        self.assertEqual(count(metrics.CACHE_FETCHES, name="test",
+                               result="miss"), 1)
+        self.assertEqual(count(metrics.CACHE_FETCHES, name="test",
+                               result="hit"), 1)
+
+    def test_new_version_is_computed(self):
+        self.fetch(version=1)
+        self.compute.return_value = "new"
+        self.assertEqual(self.fetch(version=2), "new")
+        self.assertEqual(count(metrics.CACHE_FETCHES, name="test",
+                               result="refresh"), 1)
+
+    def test_stale_value_is_served_while_rebuilding(self):
+        self.fetch(version=1)
+        cache.add("key:lock", 1)
+        self.assertEqual(self.fetch(version=2), "value")
+        self.compute.assert_called_once()
+        self.assertEqual(count(metrics.CACHE_FETCHES, name="test",
+                               result="stale"), 1)
+        self.assertEqual(count(metrics.STAMPEDES, name="test"), 1)
+
+    def test_cold_entry_waits_for_the_rebuild(self):
+        cache.add("key:lock", 1)
+        with mock.patch.object(stampede, "LOCK_TIMEOUT", 0.2):
+            self.assertEqual(self.fetch(), "value")
+        self.assertEqual(count(metrics.CACHE_FETCHES, name="test",
+                               result="timeout"), 1)
+
+    def test_early_refresh(self):
+        cache.set("key", ("old", None, time.time() + 1, 10))
+        with mock.patch.object(stampede.random, "random", return_value=0.5):
+            self.assertEqual(self.fetch(), "value")
+        self.assertEqual(count(metrics.CACHE_FETCHES, name="test",
+                               result="early_refresh"), 1)
+
+    def test_concurrent_requests_compute_once(self):
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.2)
+            return "value"
+
+        self.compute.side_effect = slow
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.fetch()))
+            for _ in range(8)
+        ]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["value"] * 8)
+        self.compute.assert_called_once()
+        self.assertEqual(count(metrics.STAMPEDES, name="test"), 7)
+
+    def test_anonymous_search_is_cached(self):
+        url = reverse("posts:search")
+        Client().get(url, {"q": "толстой"})
+        with self.assertNumQueries(0):
+            response = Client().get(url, {"q": "толстой"})
+        self.assertContains(response, "Толстой")
+        Post.objects.create(text="Толстой и Чехов", author=self.user)
+        response = Client().get(url, {"q": "толстой"})
+        self.assertContains(response, "Чехов")
+
+    def test_logged_in_search_is_not_cached(self):
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse("posts:search"), {"q": "толстой"})
+        response = client.get(reverse("posts:search"), {"q": "толстой"})
+        self.assertIsNotNone(response.context)
@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+User = get_user_model()
+
+calls = []
+
+
+def record(*args, **kwargs):
+    calls.append((args, kwargs))
+
+
+def explode():
+    raise RuntimeError("boom")
+
+
+@override_settings(TASK_RETRY_DELAY=10, TASK_VISIBILITY_TIMEOUT=60)
+class TaskQueueTests(TestCase):
+    def setUp(self) -> None:
+        calls.clear()
+
+    def test_enqueued_task_runs_once(self):
+        tasks.enqueue(record, args=(1, "a"), kwargs={"b": 2})
+        self.assertTrue(tasks.run_next())
+        self.assertFalse(tasks.run_next())
+        self.assertEqual(calls, [((1, "a"), {"b": 2})])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_delayed_task_waits(self):
+        tasks.enqueue(record, delay=60)
+        self.assertFalse(tasks.run_next())
+
+    def test_same_key_is_queued_once(self):
+        self.assertIsNotNone(tasks.enqueue(record, key="k"))
+        self.assertIsNone(tasks.enqueue(record, key="k"))
+        tasks.run_next()
+        self.assertIsNotNone(tasks.enqueue(record, key="k"))
+
+    def test_failed_task_is_retried_with_backoff(self):
+        tasks.enqueue(explode, max_attempts=2)
+        before = timezone.now()
+        tasks.run_next()
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertIn("boom", task.last_error)
+        self.assertGreaterEqual(task.run_at, before + timedelta(seconds=10))
+        self.assertFalse(tasks.run_next())
+        Task.objects.update(run_at=timezone.now())
+        tasks.run_next()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_backoff_grows(self):
+        self.assertEqual(
+            [tasks.backoff(attempt) for attempt in (1, 2, 3)], [10, 20, 40]
+        )
+
+    def test_abandoned_task_is_claimed_again(self):
+        tasks.enqueue(record)
+        first = tasks.claim()
+        self.assertIsNone(tasks.claim())
+        Task.objects.update(locked_until=timezone.now())
+        second = tasks.claim()
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.attempts, 2)
+        # The first worker lost the task, its result is ignored.
+        tasks.execute(first)
+        self.assertEqual(Task.objects.get().status, Task.RUNNING)
+        tasks.execute(second)
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_abandoned_last_attempt_fails(self):
+        tasks.enqueue(record, max_attempts=1)
+        tasks.claim()
+        Task.objects.update(locked_until=timezone.now())
+        self.assertFalse(tasks.run_next())
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_done_task_forgets_its_arguments(self):
+        tasks.enqueue(record, args=("secret",))
+        tasks.run_next()
+        self.assertEqual(Task.objects.get().payload, "{}")
+
+    @override_settings(TASK_RETENTION=60)
+    def test_finished_tasks_are_pruned(self):
+        tasks.enqueue(record)
+        tasks.enqueue(explode, max_attempts=1)
+        while tasks.run_next():
+            pass
+        tasks.enqueue(record)
+        self.assertEqual(tasks.prune(), 0)
+        Task.objects.update(run_at=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(tasks.prune(), 2)
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
+
+    def test_runworker_burst(self):
+        for number in range(3):
+            tasks.enqueue(record, args=(number,))
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        shared = {
+            "default": {
+                "BACKEND": "core.cache_backends.SQLiteCache",
+                "LOCATION": os.path.join(directory, "cache.sqlite3"),
+            }
+        }
+        with self.settings(CACHES=shared):
+            call_command("runworker", "--burst", stdout=mock.Mock())
+        self.assertEqual(len(calls), 3)
+
+    def test_runworker_needs_a_shared_cache(self):
+        tasks.enqueue(record)
+        with self.assertRaisesMessage(CommandError, "CACHE_LOCATION"):
+            call_command("runworker", "--burst", stdout=mock.Mock())
+        self.assertEqual(calls, [])
+
+    def test_password_reset_email_is_queued(self):
+        User.objects.create_user(
+            username="John", email="john@example.com", password="secret"
+        )
+        self.client.post(
+            reverse("users:password_reset"), {"email": "john@example.com"}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        tasks.run_next()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["john@example.com"])
@@ -0,0 +1,126 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from core.models import Task
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+        cls.post = Post.objects.create(
+            text="text",
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name="small.gif", content=SMALL_GIF, content_type="image/gif"
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        geometry_string, options = thumbnails.SIZES[0]
+        _, self.thumbnail, _ = default.backend.resolve(
+            self.post.image, geometry_string, **options
+        )
+        self.addCleanup(default.storage.delete, self.thumbnail.name)
+
+    def test_saved_image_is_queued_once(self):
+        self.post.save()
+        self.post.save()
+        self.assertEqual(
+            Task.objects.filter(name="posts.thumbnails.render").count(),
+            len(thumbnails.SIZES),
+        )
+
+    def test_missing_thumbnail_is_not_rendered_in_request(self):
+        with mock.patch.object(default.engine, "get_image") as get_image:
+            response = Client().get(reverse("posts:index"))
+        get_image.assert_not_called()
+        self.assertNotContains(response, self.thumbnail.name)
+        self.assertContains(response, "aspect-ratio: 960 / 339")
+
+    def test_ready_thumbnail_is_shown(self):
+        default.storage.save(self.thumbnail.name, ContentFile(SMALL_GIF))
+        response = Client().get(reverse("posts:index"))
+        self.assertContains(response, self.thumbnail.url)
+
+    def test_ready_signal_invalidates_feed(self):
+        Client().get(reverse("posts:index"))
+        default.storage.save(self.thumbnail.name, ContentFile(SMALL_GIF))
+        thumbnails.thumbnail_ready.send(
+            sender=thumbnails.PregeneratedBackend,
+            name=self.thumbnail.name,
+            source=self.post.image.name,
+        )
+        response = Client().get(reverse("posts:index"))
+        self.assertContains(response, self.thumbnail.url)
+
+    def test_variants_are_offered_by_srcset(self):
+        default.storage.save(self.thumbnail.name, ContentFile(SMALL_GIF))
+        format_ = thumbnails.FORMATS[-1]
+        width, geometry_string, options = thumbnails.variants(format_)[0]
+        _, variant, _ = default.backend.resolve(
+            self.post.image, geometry_string, **options
+        )
+        self.addCleanup(default.storage.delete, variant.name)
+        self.assertTrue(variant.name.endswith("." + format_.lower()))
+        default.storage.save(variant.name, ContentFile(SMALL_GIF))
+        response = Client().get(
+            reverse("posts:post_detail", args=(self.post.pk,))
+        )
+        self.assertContains(
+            response,
+            f'<source type="{thumbnails.MIME_TYPES[format_]}" '
+            f'srcset="{variant.url} {width}w"',
+        )
+        self.assertContains(response, f'src="{self.thumbnail.url}"')
+
+    def test_avif_thumbnails_are_named(self):
+        _, thumbnail, _ = default.backend.resolve(
+            self.post.image, "480x170", crop="center", format="AVIF"
+        )
+        self.assertTrue(thumbnail.name.endswith(".avif"))
+
+    def test_bench_images_reports_savings(self):
+        out = StringIO()
+        call_command("bench_images", stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["images"], 1)
+        self.assertEqual(report["clients"]["phone_2x"]["width"], 720)
+        self.assertIn("saved_bytes", report["clients"]["phone_1x"]["jpeg"])
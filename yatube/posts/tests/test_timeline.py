@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="John")
+        cls.follower = User.objects.create_user(username="Bobik")
+        cls.old_post = Post.objects.create(text="old", author=cls.author)
+
+    def feed(self):
+        return timeline.posts_of(timeline.feed(self.follower))
+
+    def test_follow_backfills_timeline(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_new_post_is_fanned_out(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(text="new", author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.follower, post=post
+            ).exists()
+        )
+
+    def test_unfollow_clears_timeline(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        Follow.objects.filter(user=self.follower).delete()
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @mock.patch.object(timeline, "CELEBRITY_FOLLOWERS", 2)
+    def test_celebrity_posts_are_pulled_on_read(self):
+        fan = User.objects.create_user(username="Lelik")
+        Follow.objects.create(user=fan, author=self.author)
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(text="new", author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=fan, post=post).exists()
+        )
+
+    @mock.patch.object(timeline, "CELEBRITY_FOLLOWERS", 1)
+    def test_reads_without_new_celebrity_posts_do_not_write(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.feed()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.feed(), [self.old_post])
+        statements = [query["sql"].split()[0] for query in queries]
+        self.assertEqual(set(statements), {"SELECT"})
+        post = Post.objects.create(text="new", author=self.author)
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command("rebuild_timelines", stdout=mock.Mock())
+        self.assertEqual(self.feed(), [self.old_post])
@@ -0,0 +1,146 @@
+import hashlib
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import tasks
+from core.models import Task
+
+from .. import uploads
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+GPS_INFO = 0x8825
+STORED_NAME = r"^posts/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$"
+
+
+def jpeg(size=(40, 20), exif=True, camera="Camera", image=None):
+    if image is None:
+        image = Image.effect_noise(size, 64).convert("RGB")
+    buffer = BytesIO()
+    options = {}
+    if exif:
+        data = Image.Exif()
+        data[ORIENTATION] = 6
+        data[0x010F] = camera
+        options["exif"] = data.tobytes()
+    image.save(buffer, "JPEG", **options)
+    return buffer.getvalue()
+
+
+def png(size):
+    buffer = BytesIO()
+    Image.new("L", size).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="John")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, content, name="photo.jpg"):
+        return self.client.post(
+            reverse("posts:create_post"),
+            {
+                "text": "Пост с фото",
+                "image": SimpleUploadedFile(name, content, "image/jpeg"),
+            },
+        )
+
+    def queued(self, name):
+        return Task.objects.filter(name=name).count()
+
+    def test_upload_is_stored_and_processed_later(self):
+        with mock.patch.object(uploads, "sanitize") as sanitize:
+            response = self.create(jpeg())
+        self.assertRedirects(
+            response,
+            reverse("posts:profile", args=("John",)),
+            fetch_redirect_response=False,
+        )
+        sanitize.assert_not_called()
+        post = Post.objects.get()
+        uploaded = post.image.name
+        self.assertEqual(self.queued("posts.uploads.process"), 1)
+        self.assertEqual(self.queued("posts.thumbnails.render"), 0)
+
+        self.assertTrue(tasks.run_next())
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, uploaded)
+        self.assertFalse(post.image.storage.exists(uploaded))
+        self.assertRegex(post.image.name, STORED_NAME)
+        with post.image.open() as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+            self.assertIn(digest, post.image.name)
+            file.seek(0)
+            image = Image.open(file)
+            exif = image.getexif()
+            self.assertEqual(image.size, (20, 40))
+        self.assertNotIn(ORIENTATION, exif)
+        self.assertNotIn(0x010F, exif)
+        self.assertGreater(self.queued("posts.thumbnails.render"), 0)
+
+    def test_same_photo_is_one_file_once_cleaned(self):
+        photo = Image.effect_noise((40, 20), 64).convert("RGB")
+        for camera in ("Camera", "Phone"):
+            self.create(jpeg(camera=camera, image=photo))
+        first, second = Post.objects.all()
+        self.assertNotEqual(first.image.name, second.image.name)
+        while tasks.run_next():
+            pass
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, STORED_NAME)
+
+    @override_settings(UPLOAD_MAX_SIZE=1000)
+    def test_large_file_is_refused(self):
+        response = self.create(jpeg(size=(400, 400)))
+        self.assertFormError(
+            response, "form", "image", "Файл больше 1000\xa0байт."
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(UPLOAD_MAX_PIXELS=10_000)
+    def test_large_image_is_refused_from_its_header(self):
+        with mock.patch.object(
+            uploads.TemporaryFileUploadHandler, "file_complete"
+        ) as file_complete:
+            response = self.create(png((200, 100)), name="big.png")
+        file_complete.assert_not_called()
+        self.assertIn("200x100", response.context["form"].errors["image"][0])
+        self.assertFalse(Post.objects.exists())
+
+    def test_broken_image_is_removed(self):
+        content = jpeg(size=(400, 400), exif=False)
+        self.create(content[:len(content) // 2])
+        post = Post.objects.get()
+        uploaded = post.image.name
+        with self.assertLogs("posts.uploads", "WARNING"):
+            tasks.run_next()
+        post.refresh_from_db()
+        self.assertFalse(post.image)
+        self.assertFalse(post.image.storage.exists(uploaded))
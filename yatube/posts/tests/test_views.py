@@ -149,14 +149,38 @@ class PostsViewsTests(TestCase):
 
     def test_main_page_is_cached(self):
         """
-        Asserting that main page is cached
+        Asserting that main page feed is cached and shared between users
         """
         cache.clear()
-        self.client.get(reverse("posts:index"))
+        self.guest_client.get(reverse("posts:index"))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(reverse("posts:index"))
+        self.assertContains(response, self.post.text)
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertContains(response, self.post.text)
+        self.assertContains(response, self.user.username)
+
+    def test_main_page_cache_is_invalidated(self):
+        """
+        Changing posts should drop the cached main page immediately
+        """
+        cache.clear()
+        self.guest_client.get(reverse("posts:index"))
         Post.objects.all().delete()
-        response = self.client.get(reverse("posts:index"))
-        decoded = response.content.decode(encoding="UTF-8", errors="strict")
-        self.assertInHTML(self.post.text, decoded)
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertNotContains(response, self.post.text)
+
+    def test_main_page_cache_follows_renames(self):
+        """
+        Renaming an author should drop the cached main page as well
+        """
+        cache.clear()
+        self.guest_client.get(reverse("posts:index"))
+        self.user.first_name = "Джон"
+        self.user.last_name = "Смит"
+        self.user.save()
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertContains(response, "Джон Смит")
 
     def test_followed_authors_page(self):
         """
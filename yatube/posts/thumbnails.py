@@ -0,0 +1,165 @@
+"""
+Thumbnail pre-generation.
+
+PregeneratedBackend is the sorl-thumbnail backend of the project. It
+never resizes inside a request: when a thumbnail file is missing it
+queues a background task (see core.tasks) and returns None, so the
+{% thumbnail %} tag renders its {% empty %} placeholder until the file
+exists. New images are queued as soon as their post is saved, and the
+generate_thumbnails command backfills the existing ones.
+
+Thumbnail names are computed from the source name, geometry and options
+without touching the key value store, so workers need no database.
+"""
+from django.core.exceptions import SuspiciousFileOperation
+from django.dispatch import Signal
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import serialize, tokey
+from sorl.thumbnail.images import ImageFile
+
+from core.tasks import enqueue
+
+# Post images are shown as 960x339 crops. The JPEG is the fallback every
+# browser can show, smaller clients pick a variant of the same crop in
+# a modern format through srcset (see templatetags.pictures).
+ASPECT = (960, 339)
+FALLBACK = ("960x339", {"crop": "center", "upscale": True})
+WIDTHS = (480, 720, 960)
+MIME_TYPES = {"AVIF": "image/avif", "WEBP": "image/webp"}
+Image.init()
+# Best compression first, only the formats this Pillow can write.
+FORMATS = tuple(name for name in ("AVIF", "WEBP") if name in Image.SAVE)
+EXTENSIONS = dict(EXTENSIONS, AVIF="avif")
+
+
+def geometry(width):
+    return f"{width}x{round(width * ASPECT[1] / ASPECT[0])}"
+
+
+def variants(format_):
+    """(width, geometry, options) of every size of format_."""
+    return [
+        (width, geometry(width), dict(FALLBACK[1], format=format_))
+        for width in WIDTHS
+    ]
+
+
+# Every (geometry, options) the templates ask for.
+SIZES = (FALLBACK,) + tuple(
+    (geometry_string, options)
+    for format_ in FORMATS
+    for _, geometry_string, options in variants(format_)
+)
+
+# Sent when a queued thumbnail has been written, so fragments cached
+# with placeholders can be dropped.
+thumbnail_ready = Signal(providing_args=["name", "source"])
+
+
+class PregeneratedBackend(ThumbnailBackend):
+    def resolve(self, file_, geometry_string, **options):
+        """
+        Return (source, thumbnail, options) with the options completed
+        the way ThumbnailBackend.get_thumbnail does before naming the file.
+        """
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return source, ImageFile(name, default.storage), options
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        # ThumbnailBackend's naming, with AVIF added to the extensions.
+        key = tokey(source.key, geometry_string, serialize(options))
+        return "{}{}/{}/{}.{}".format(
+            thumbnail_settings.THUMBNAIL_PREFIX,
+            key[:2],
+            key[2:4],
+            key,
+            EXTENSIONS[options["format"]],
+        )
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError("falsey file_ argument in get_thumbnail()")
+        source, thumbnail, options = self.resolve(
+            file_, geometry_string, **options
+        )
+        if thumbnail.exists():
+            return thumbnail
+        try:
+            available = source.exists()
+        except SuspiciousFileOperation:
+            # Not a file of the storage, e.g. an absolute path.
+            available = False
+        if available:
+            schedule(source.name, thumbnail.name, geometry_string, options)
+        return None
+
+    def render(self, source_name, thumbnail_name, geometry_string, options):
+        """Decode the source and write the thumbnail, in a worker."""
+        thumbnail = ImageFile(thumbnail_name, default.storage)
+        source = ImageFile(source_name)
+        if thumbnail.exists() or not source.exists():
+            # Done already, or the source was replaced or deleted since.
+            return False
+        source_image = default.engine.get_image(source)
+        try:
+            options["image_info"] = default.engine.get_image_info(
+                source_image
+            )
+            self._create_thumbnail(
+                source_image, geometry_string, options, thumbnail
+            )
+            self._create_alternative_resolutions(
+                source_image, geometry_string, options, thumbnail.name
+            )
+        finally:
+            default.engine.cleanup(source_image)
+        return True
+
+
+def render(source_name, thumbnail_name, geometry_string, options):
+    """Task writing one thumbnail."""
+    if default.backend.render(
+        source_name, thumbnail_name, geometry_string, options
+    ):
+        thumbnail_ready.send(
+            sender=PregeneratedBackend,
+            name=thumbnail_name,
+            source=source_name,
+        )
+
+
+def schedule(source_name, thumbnail_name, geometry_string, options):
+    """Queue a thumbnail unless it is already waiting in the queue."""
+    return enqueue(
+        render,
+        args=(source_name, thumbnail_name, geometry_string, options),
+        key=f"thumbnail:{thumbnail_name}",
+    )
+
+
+def pregenerate(image):
+    """Queue every size the templates use for image."""
+    for geometry_string, options in SIZES:
+        default.backend.get_thumbnail(image, geometry_string, **options)
+
+
+def delete(image):
+    """Delete every size of image."""
+    for geometry_string, options in SIZES:
+        _, thumbnail, _ = default.backend.resolve(
+            image, geometry_string, **options
+        )
+        thumbnail.delete()
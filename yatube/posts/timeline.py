@@ -0,0 +1,167 @@
+"""
+Precomputed follow feeds (fan-out on write).
+
+Every new post is copied into the timelines of its author's followers,
+so follow_index reads a single user's rows instead of joining through
+Follow. Authors with CELEBRITY_FOLLOWERS followers or more are not fanned
+out: their new posts are pulled into a reader's timeline when the reader
+opens the feed, so one post never turns into millions of writes.
+
+Entries keep a copy of the post pub_date, so feeds are read in
+(user, pub_date) index order without touching the posts table.
+"""
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Follow, Post, TimelineEntry, TimelineSync, UserStats
+
+CELEBRITY_FOLLOWERS = settings.TIMELINE_CELEBRITY_FOLLOWERS
+BATCH_SIZE = 500
+KEYSET = ("pub_date", "post_id")
+# Posts committed shortly after a pull started may carry an older
+# pub_date, so every pull looks back a little further.
+PULL_OVERLAP = timedelta(minutes=1)
+# A pull only looks at posts newer than pulled_at, moving it limits the
+# scan but costs a write.
+PULL_INTERVAL = timedelta(minutes=10)
+
+
+def is_celebrity(author_id):
+    return UserStats.objects.filter(
+        pk=author_id, followers_count__gte=CELEBRITY_FOLLOWERS
+    ).exists()
+
+
+def celebrity_ids(user):
+    """Ids of celebrity authors followed by user."""
+    followed = Follow.objects.filter(user=user).values("author_id")
+    return UserStats.objects.filter(
+        pk__in=followed, followers_count__gte=CELEBRITY_FOLLOWERS
+    ).values_list("pk", flat=True)
+
+
+def posts_of(entries):
+    return [entry.post for entry in entries]
+
+
+def feed(user):
+    """
+    Timeline entries of user, newest first. Paginate them by KEYSET and
+    turn pages into posts with posts_of.
+    """
+    pull_celebrities(user)
+    return (
+        TimelineEntry.objects.filter(user=user)
+        .select_related("post__author", "post__group")
+        .order_by("-pub_date", "-post_id")
+    )
+
+
+def pull_celebrities(user):
+    """
+    Copy new posts of followed celebrities into the user's timeline.
+    Reads are frequent and new celebrity posts rare, so nothing is
+    written unless there are posts missing from the timeline, and
+    pulled_at is moved at most every PULL_INTERVAL.
+    """
+    celebrities = list(celebrity_ids(user))
+    if not celebrities:
+        return
+    sync = TimelineSync.objects.filter(user=user).first()
+    started = timezone.now()
+    posts = Post.objects.filter(author_id__in=celebrities)
+    entries = TimelineEntry.objects.filter(user=user)
+    if sync is not None and sync.pulled_at is not None:
+        since = sync.pulled_at - PULL_OVERLAP
+        posts = posts.filter(pub_date__gt=since)
+        entries = entries.filter(pub_date__gt=since)
+    missing = list(
+        posts.exclude(pk__in=entries.values("post_id")).values_list(
+            "pk", "pub_date"
+        )
+    )
+    if missing:
+        deliver([user.pk], missing)
+    if sync is None:
+        TimelineSync.objects.create(user=user, pulled_at=started)
+    elif missing and (
+        sync.pulled_at is None or started - sync.pulled_at >= PULL_INTERVAL
+    ):
+        TimelineSync.objects.filter(pk=user.pk).update(pulled_at=started)
+
+
+def deliver(user_ids, posts):
+    """Add posts, given as (id, pub_date) pairs, to the timelines."""
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in user_ids
+            for post_id, pub_date in posts
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    """Push a new post into its author's followers timelines."""
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            "user_id", flat=True
+        )
+    )
+    deliver(follower_ids, [(post.pk, post.pub_date)])
+
+
+def backfill(user_ids, author_id):
+    """Copy all of the author's posts into the given timelines."""
+    posts = list(
+        Post.objects.filter(author_id=author_id).values_list("pk", "pub_date")
+    )
+    deliver(user_ids, posts)
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    demoted = UserStats.objects.filter(
+        pk=author_id, followers_count=CELEBRITY_FOLLOWERS - 1
+    )
+    if demoted.exists():
+        # The author just stopped being a celebrity: readers who did not
+        # pull meanwhile miss the latest posts, deliver them now.
+        followers = Follow.objects.filter(author_id=author_id)
+        user_ids = list(followers.values_list("user_id", flat=True))
+        backfill(user_ids, author_id)
+
+
+def rebuild(users=None):
+    """
+    Drop and recreate timelines of the given users (all users if None).
+    Celebrity posts are left to the next pull. Returns the number of
+    follow relations processed.
+    """
+    entries = TimelineEntry.objects.all()
+    syncs = TimelineSync.objects.all()
+    follows = Follow.objects.order_by("author_id")
+    if users is not None:
+        entries = entries.filter(user__in=users)
+        syncs = syncs.filter(user__in=users)
+        follows = follows.filter(user__in=users)
+    entries.delete()
+    syncs.delete()
+    processed = 0
+    rows = list(follows.values_list("author_id", "user_id"))
+    for author_id, group in groupby(rows, key=itemgetter(0)):
+        user_ids = [user_id for _, user_id in group]
+        if not is_celebrity(author_id):
+            backfill(user_ids, author_id)
+        processed += len(user_ids)
+    return processed
@@ -0,0 +1,149 @@
+"""
+Image uploads.
+
+Requests only do the cheap part of an upload. StreamingImageUploadHandler
+streams the file to a temporary file on disk, never to memory, refuses
+it as soon as it grows past UPLOAD_MAX_SIZE, and parses the image header
+from the first chunks to refuse images of more than UPLOAD_MAX_PIXELS
+before the rest is received. The post is saved with the file as it was
+uploaded, which the storage moves into place without copying.
+
+Decoding the whole image, stripping its metadata (EXIF with the camera
+and GPS position) and encoding it again happen in a worker: saving a
+post with a new upload queues process(), which swaps the cleaned file
+in and only then queues the thumbnails. An image that fails to decode
+is removed from its posts.
+"""
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import (
+    SkipFile,
+    TemporaryFileUploadHandler,
+)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageFile, ImageOps
+
+from core.tasks import enqueue
+
+from . import images
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Give up looking for an image header after this many bytes.
+HEADER_LIMIT = 1024 * 1024
+# Formats encoded again without metadata. Others, e.g. GIF, carry no
+# EXIF and are kept as uploaded once they decode.
+REENCODED = {"JPEG": {"quality": 90}, "PNG": {"optimize": True}, "WEBP": {}}
+INVALID_IMAGE = (
+    "Загрузите правильное изображение. Файл, который вы загрузили, "
+    "поврежден или не является изображением."
+)
+DECODE_ERRORS = (
+    OSError,
+    SyntaxError,
+    ValueError,
+    Image.DecompressionBombError,
+)
+
+
+class StreamingImageUploadHandler(TemporaryFileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.parser = ImageFile.Parser()
+        self.checked = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_SIZE:
+            self.reject(
+                "Файл больше "
+                f"{filesizeformat(settings.UPLOAD_MAX_SIZE)}."
+            )
+        if not self.checked:
+            self.check_header(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def check_header(self, raw_data):
+        try:
+            self.parser.feed(raw_data)
+        except DECODE_ERRORS:
+            self.reject(INVALID_IMAGE)
+        image = self.parser.image
+        if image is None:
+            if self.received >= HEADER_LIMIT:
+                self.reject(INVALID_IMAGE)
+            return
+        # Feeding the parser any further would decode the image.
+        self.checked = True
+        width, height = image.size
+        if width * height > settings.UPLOAD_MAX_PIXELS:
+            self.reject(
+                f"Изображение {width}x{height} слишком большое, не больше "
+                f"{settings.UPLOAD_MAX_PIXELS // 1_000_000} мегапикселей."
+            )
+
+    def reject(self, message):
+        errors = getattr(self.request, "upload_errors", {})
+        errors[self.field_name] = message
+        self.request.upload_errors = errors
+        raise SkipFile(message)
+
+
+def is_valid(request, form):
+    """form.is_valid(), with the uploads the handler refused as errors."""
+    valid = form.is_valid()
+    if form.is_bound:
+        for field, message in getattr(request, "upload_errors", {}).items():
+            form.add_error(field, message)
+            valid = False
+    return valid
+
+
+def sanitize(file):
+    """
+    Decode the whole image and return it encoded again without metadata,
+    or None to keep the file as it is.
+    """
+    image = Image.open(file)
+    format_ = image.format
+    image.load()
+    if format_ not in REENCODED or getattr(image, "is_animated", False):
+        return None
+    icc_profile = image.info.get("icc_profile")
+    image = ImageOps.exif_transpose(image)
+    buffer = BytesIO()
+    options = dict(REENCODED[format_])
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+    image.save(buffer, format_, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def process(name):
+    """Task replacing the uploaded image name with its cleaned copy."""
+    storage = images.storage()
+    posts = Post.objects.filter(image=name)
+    if not posts.exists() or not storage.exists(name):
+        # The post was deleted or given another image meanwhile.
+        return
+    try:
+        with storage.open(name) as file:
+            content = sanitize(file)
+    except DECODE_ERRORS as error:
+        logger.warning("Removing broken image %s: %s", name, error)
+        stored = ""
+    else:
+        stored = name if content is None else storage.save(name, content)
+    for post in posts:
+        # Signals release the upload and queue the thumbnails.
+        post.image.name = stored
+        post.save(update_fields=["image", "updated"])
+
+
+def schedule(name):
+    return enqueue(process, args=(name,), key=f"upload:{name}")
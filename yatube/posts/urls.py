@@ -7,14 +7,33 @@ app_name = "posts"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("more/", views.index_more, name="index_more"),
+    path("feed/", views.index_feed, name="index_feed"),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
+    path("group/<slug:slug>/more/", views.group_more, name="group_more"),
+    path("group/<slug:slug>/feed/", views.group_feed, name="group_feed"),
     path("profile/<str:username>/", views.profile, name="profile"),
+    path(
+        "profile/<str:username>/more/",
+        views.profile_more,
+        name="profile_more",
+    ),
+    path(
+        "profile/<str:username>/feed/",
+        views.profile_feed,
+        name="profile_feed",
+    ),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
     path(
         "posts/<int:post_id>/comment/",
         login_required(views.add_comment),
         name="add_comment",
     ),
+    path(
+        "posts/<int:post_id>/comments/events/",
+        views.comment_events,
+        name="comment_events",
+    ),
     path("create/", login_required(views.create_post), name="create_post"),
     path(
         "posts/<int:post_id>/edit/",
@@ -32,4 +51,6 @@ urlpatterns = [
         name="profile_unfollow",
     ),
     path("follow/", views.follow_index, name="follow_index"),
+    path("follow/more/", views.follow_more, name="follow_more"),
+    path("search/", views.search_posts, name="search"),
 ]
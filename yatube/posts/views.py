@@ -1,35 +1,60 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import condition
 
+from core.cache import get_version
+from core.paginator import page_key, paginate
+from core.routers import replica_reads
+from core.stampede import cache_view
+
+from . import etags, feeds, live, search, timeline, uploads
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .signals import (
+    FEED_NAMESPACE,
+    NAMES_NAMESPACE,
+    author_namespace,
+    group_namespace,
+    post_namespace,
+)
 
 LIM = settings.PAGINATION_LIMIT
 
 
-@cache_page(20)
-@vary_on_cookie
+@replica_reads
 def index(request):
+    """
+    The feed body is cached as a template fragment shared by all users
+    and built from the feed version, so the page queries only run when
+    the fragment is missing or a post, a group or a name shown on it has
+    changed since. One request at a time rebuilds it, see core.stampede.
+    """
     posts = Post.objects.select_related("group", "author").all()
-    paginator = Paginator(posts, LIM)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
     context = {
-        "page_obj": page_obj,
+        "page_obj": SimpleLazyObject(lambda: paginate(request, posts, LIM)),
+        "feed_version": (
+            get_version(FEED_NAMESPACE),
+            get_version(NAMES_NAMESPACE),
+        ),
+        "page_key": page_key(request),
+        "cache_timeout": settings.FEED_CACHE_TIMEOUT,
     }
     template = "posts/index.html"
     return render(request, template, context)
 
 
+@replica_reads
+@condition(etag_func=etags.group_posts)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    paginator = Paginator(group.posts.select_related("author").all(), LIM)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(
+        request, group.posts.select_related("author").all(), LIM
+    )
     context = {
         "group": group,
         "page_obj": page_obj,
@@ -38,16 +63,20 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@replica_reads
+@condition(etag_func=etags.profile)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related("stats"), username=username
+    )
     is_following = False
     if not request.user.is_anonymous and request.user != author:
         is_following = Follow.objects.filter(
             user=request.user, author=author
         ).exists()
-    paginator = Paginator(author.posts.select_related("group").all(), LIM)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(
+        request, author.posts.select_related("group").all(), LIM
+    )
     context = {
         "author": author,
         "page_obj": page_obj,
@@ -56,29 +85,40 @@ def profile(request, username):
     return render(request, "posts/profile.html", context)
 
 
+@replica_reads
+@condition(etag_func=etags.post_detail)
 def post_detail(request, post_id):
     post = get_object_or_404(
         Post.objects.select_related(
-            "author",
+            "author__stats",
             "group",
         ),
         id=post_id,
     )
+    etags.remember_owners(post)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        live.publish(comment)
     comments = post.comments.filter(post=post_id).select_related("author")
-    context = {"post": post, "form": form, "comments": comments}
+    context = {
+        "post": post,
+        "form": form,
+        "comments": comments,
+        "comments_version": get_version(post_namespace(post_id)),
+        "cache_timeout": settings.FEED_CACHE_TIMEOUT,
+        "live_comments": settings.LIVE_COMMENTS,
+    }
     return render(request, "posts/post_detail.html", context)
 
 
 @login_required
 def create_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
-    if form.is_valid():
+    if uploads.is_valid(request, form):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
@@ -96,7 +136,7 @@ def edit_post(request, post_id):
     form = PostForm(
         request.POST or None, files=request.FILES or None, instance=cur_post
     )
-    if form.is_valid():
+    if uploads.is_valid(request, form):
         form.save()
         return redirect("posts:post_detail", post_id)
     return render(
@@ -115,9 +155,21 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        live.publish(comment)
     return redirect("posts:post_detail", post_id)
 
 
+def comment_events(request, post_id):
+    """
+    Server-sent events with the comments of the post as they are added,
+    see posts.live.
+    """
+    if not settings.LIVE_COMMENTS:
+        raise Http404
+    get_object_or_404(Post.objects.only("id"), id=post_id)
+    return live.stream(request, post_id)
+
+
 @login_required
 def follow(request, username):
     """
@@ -147,17 +199,130 @@ def follow_index(request):
     """
     Will dislpay posts only from user's subscriptions
     """
-    posts = (
-        Post.objects.filter(author__following__user=request.user)
-        .select_related(
-            "author",
-            "group",
-        )
+    page_obj = paginate(
+        request,
+        timeline.feed(request.user),
+        LIM,
+        keyset=timeline.KEYSET,
+        transform=timeline.posts_of,
     )
-    paginator = Paginator(posts, LIM)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
     context = {
         "page_obj": page_obj,
     }
     return render(request, "posts/follow.html", context)
+
+
+def render_more(request, posts, more_url, **pagination):
+    """
+    The next batch of post cards for infinite scroll, without the rest
+    of the page. The batch ends with the link to the one after it.
+    """
+    context = {
+        "page_obj": paginate(request, posts, LIM, **pagination),
+        "more_url": more_url,
+    }
+    return render(request, "posts/includes/more_posts.html", context)
+
+
+def group_more_namespaces(request, slug):
+    return (group_namespace(slug), NAMES_NAMESPACE)
+
+
+def profile_more_namespaces(request, username):
+    return (author_namespace(username), NAMES_NAMESPACE)
+
+
+@replica_reads
+@cache_view(
+    settings.FEED_CACHE_TIMEOUT, namespaces=(FEED_NAMESPACE, NAMES_NAMESPACE)
+)
+def index_more(request):
+    posts = Post.objects.select_related("group", "author").all()
+    return render_more(request, posts, reverse("posts:index_more"))
+
+
+@replica_reads
+@cache_view(settings.FEED_CACHE_TIMEOUT, namespaces=group_more_namespaces)
+def group_more(request, slug):
+    posts = Post.objects.filter(group__slug=slug).select_related(
+        "group", "author"
+    )
+    return render_more(
+        request, posts, reverse("posts:group_more", args=(slug,))
+    )
+
+
+@replica_reads
+@cache_view(settings.FEED_CACHE_TIMEOUT, namespaces=profile_more_namespaces)
+def profile_more(request, username):
+    posts = Post.objects.filter(author__username=username).select_related(
+        "group", "author"
+    )
+    return render_more(
+        request, posts, reverse("posts:profile_more", args=(username,))
+    )
+
+
+@login_required
+def follow_more(request):
+    return render_more(
+        request,
+        timeline.feed(request.user),
+        reverse("posts:follow_more"),
+        keyset=timeline.KEYSET,
+        transform=timeline.posts_of,
+    )
+
+
+@replica_reads
+@condition(etag_func=etags.index)
+def index_feed(request):
+    posts = Post.objects.select_related("group", "author")
+    return feeds.atom_response(
+        request, "Pytube", reverse("posts:index"), posts
+    )
+
+
+@replica_reads
+@condition(etag_func=etags.group_posts)
+def group_feed(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    posts = group.posts.select_related("group", "author")
+    return feeds.atom_response(
+        request,
+        group.title,
+        reverse("posts:group_list", args=(slug,)),
+        posts,
+    )
+
+
+@replica_reads
+@condition(etag_func=etags.profile)
+def profile_feed(request, username):
+    author = get_object_or_404(User, username=username)
+    posts = author.posts.select_related("group", "author")
+    return feeds.atom_response(
+        request,
+        author.get_full_name() or author.username,
+        reverse("posts:profile", args=(username,)),
+        posts,
+    )
+
+
+@cache_view(settings.FEED_CACHE_TIMEOUT, namespaces=(FEED_NAMESPACE,))
+def search_posts(request):
+    """
+    Posts matching ?q=, best matches first, with highlighted snippets.
+    """
+    query = request.GET.get("q", "").strip()
+    page_obj = None
+    if query:
+        page_obj = search.RankedPaginator(
+            search.search(query), LIM
+        ).get_page(request.GET.get("cursor"))
+    context = {
+        "query": query,
+        "query_string": urlencode({"q": query}),
+        "page_obj": page_obj,
+    }
+    return render(request, "posts/search.html", context)
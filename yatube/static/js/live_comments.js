@@ -0,0 +1,28 @@
+// Live comments on the post page. The [data-comment-events] marker holds
+// the URL of the event stream of the post: each comment event carries the
+// card of a new comment, added on top of the list unless the page shows
+// it already. Without EventSource the page stays as it was rendered.
+(function () {
+  "use strict";
+
+  var marker = document.querySelector("[data-comment-events]");
+  if (!marker || !("EventSource" in window)) {
+    return;
+  }
+
+  var list = document.querySelector("[data-comments-list]");
+  var title = document.querySelector("[data-comments-count]");
+  var source = new EventSource(marker.dataset.commentEvents);
+
+  source.addEventListener("comment", function (event) {
+    if (document.getElementById("comment-" + event.lastEventId)) {
+      return;
+    }
+    var card = document.createElement("template");
+    card.innerHTML = event.data;
+    list.prepend(card.content);
+    var count = Number(title.dataset.commentsCount) + 1;
+    title.dataset.commentsCount = count;
+    title.textContent = "Комментарии (" + count + "):";
+  });
+})();
@@ -0,0 +1,58 @@
+// Infinite scroll for the post feeds. When the [data-more] marker after
+// the post cards comes into view, it is replaced with the next batch of
+// cards, which ends with the marker of the batch after it. Without
+// JavaScript, or if a batch fails to load, the paginator links remain.
+(function () {
+  "use strict";
+
+  if (!("IntersectionObserver" in window) || !("fetch" in window)) {
+    return;
+  }
+
+  var paginators = document.querySelectorAll("nav[aria-label='Page navigation']");
+
+  function showPaginators(visible) {
+    paginators.forEach(function (nav) {
+      nav.hidden = !visible;
+    });
+  }
+
+  var observer = new IntersectionObserver(function (entries) {
+    entries.forEach(function (entry) {
+      if (entry.isIntersecting) {
+        load(entry.target);
+      }
+    });
+  }, {rootMargin: "800px 0px"});
+
+  function watch(root) {
+    root.querySelectorAll("[data-more]").forEach(function (marker) {
+      observer.observe(marker);
+    });
+  }
+
+  function load(marker) {
+    observer.unobserve(marker);
+    fetch(marker.dataset.more, {credentials: "same-origin"})
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.statusText);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        var batch = document.createElement("div");
+        batch.innerHTML = html;
+        marker.replaceWith(batch);
+        watch(batch);
+      })
+      .catch(function () {
+        showPaginators(true);
+      });
+  }
+
+  if (document.querySelector("[data-more]")) {
+    showPaginators(false);
+    watch(document);
+  }
+})();
@@ -0,0 +1,8 @@
+from django.core.mail import EmailMultiAlternatives
+
+
+def send_email(subject, body, from_email, recipients, html_message=None):
+    message = EmailMultiAlternatives(subject, body, from_email, recipients)
+    if html_message is not None:
+        message.attach_alternative(html_message, 'text/html')
+    message.send()
@@ -8,6 +8,7 @@ from django.contrib.auth.views import (LoginView, LogoutView,
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -27,7 +28,9 @@ urlpatterns = [
          name='password_change_done'),
 
     path('password_reset/',
-         PasswordResetView.as_view(template_name='users/password_reset.html'),
+         PasswordResetView.as_view(
+             template_name='users/password_reset.html',
+             form_class=QueuedPasswordResetForm),
          name='password_reset'),
     path('password_reset/done/',
          PasswordResetDoneView.as_view
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     "core.apps.CoreConfig",
     "users.apps.UsersConfig",
     "posts.apps.PostsConfig",
+    "api.apps.ApiConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -59,9 +60,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.routers.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    # Fills in the relative dates of cached pages, see posts.dates
+    "posts.dates.RelativeDatesMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -73,6 +78,11 @@ if DEBUG:
         "debug_toolbar.middleware.DebugToolbarMiddleware",
     ]
 
+# Token scrapers of /metrics/ send as "Authorization: Bearer <token>".
+# Behind a reverse proxy every request comes from a local address, so the
+# client address proves nothing; without a token the page is disabled.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
 
 # Setting up cache
 CACHES = {
@@ -80,6 +90,27 @@ CACHES = {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
+# With several worker processes the cache has to be shared by all of them,
+# or cache versions bumped in one process never reach the others. The
+# task worker is such a process and refuses to start without it
+if os.environ.get("CACHE_LOCATION"):
+    CACHES["default"] = {
+        "BACKEND": "core.cache_backends.SQLiteCache",
+        "LOCATION": os.environ["CACHE_LOCATION"],
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    }
+
+# Lifetime of cached page fragments. Fragments are keyed by data versions
+# and never go stale, the timeout only bounds relative dates and memory
+FEED_CACHE_TIMEOUT = 60
+# How long an expired or outdated entry may still be served while a single
+# request rebuilds it, see core.stampede
+STALE_TIMEOUT = 30
+# Rendered post cards are keyed by the post update time, the timeout only
+# bounds memory
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Number of the newest posts in the Atom feeds
+ATOM_FEED_ENTRIES = 20
 
 ROOT_URLCONF = "yatube.urls"
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
@@ -100,6 +131,21 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "yatube.wsgi.application"
+# Served by an ASGI server, see core.asgi: threads running Django, i.e.
+# requests touching the database at once, however many clients wait
+ASGI_APPLICATION = "yatube.asgi.application"
+ASGI_THREADS = 16
+
+# New comments are pushed to the readers of a post as server-sent events,
+# see posts.live. Every open post page then holds a stream, which ties up
+# a WSGI worker: turn it on when the site is served through core.asgi.
+# Served by several processes, they exchange the events through sockets
+# in PUBSUB_SOCKET_DIR, see core.pubsub
+LIVE_COMMENTS = os.environ.get("LIVE_COMMENTS") == "1"
+PUBSUB_SOCKET_DIR = os.environ.get("PUBSUB_SOCKET_DIR")
+EVENT_STREAM_HEARTBEAT = 15
+# Longest stream over WSGI, where it holds a worker thread
+EVENT_STREAM_TIMEOUT = 60
 
 
 # Database
@@ -109,8 +155,40 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        # Reuse connections, they are tuned by core.sqlite when opened
+        "CONN_MAX_AGE": 600,
+        # Seconds a query waits for a lock before "database is locked"
+        "OPTIONS": {"timeout": 20},
     }
 }
+# Applied to every new SQLite connection, see core.sqlite
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    # Negative sizes are in KiB: 64 MiB of page cache per connection
+    "cache_size": -64000,
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+# Read replicas, e.g. DATABASE_REPLICAS=/var/db/replica1.sqlite3,... kept
+# in sync with the primary by manage.py sync_replicas. Tests read from the
+# test database of the primary
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.environ.get("DATABASE_REPLICAS", "").split(",")), 1
+):
+    alias = f"replica{number}"
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+        "CONN_MAX_AGE": 600,
+        "OPTIONS": {"timeout": 20},
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+# Seconds a client reads from the primary after writing
+REPLICA_STICKINESS = 10
 
 
 # Password validation
@@ -152,6 +230,17 @@ USE_TZ = True
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Uploads are streamed to disk and checked from their header, the image
+# is decoded and cleaned by a worker, see posts.uploads
+FILE_UPLOAD_HANDLERS = ["posts.uploads.StreamingImageUploadHandler"]
+UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+UPLOAD_MAX_PIXELS = 40_000_000
+
+# Uploads are stored by content hash, thumbnails under their own names
+DEFAULT_FILE_STORAGE = "core.storage.ContentAddressedStorage"
+THUMBNAIL_STORAGE = "django.core.files.storage.FileSystemStorage"
+THUMBNAIL_BACKEND = "posts.thumbnails.PregeneratedBackend"
+
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 
@@ -168,3 +257,23 @@ CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 # Pagination limit, replace with DRF in the future
 
 PAGINATION_LIMIT = 10
+
+# Largest page and ?ids= list served by the JSON API
+
+API_MAX_LIMIT = 100
+
+# Authors with at least this many followers are not fanned out into
+# follow timelines, their posts are pulled into the feed at read time
+
+TIMELINE_CELEBRITY_FOLLOWERS = 1000
+
+# Background tasks, see core.tasks. Delays and timeouts are in seconds.
+
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+TASK_MAX_RETRY_DELAY = 60 * 60
+TASK_VISIBILITY_TIMEOUT = 5 * 60
+TASK_POLL_INTERVAL = 1
+# Done and failed tasks are kept this long, then deleted by runworker
+TASK_RETENTION = 7 * 24 * 60 * 60
+TASK_PRUNE_INTERVAL = 60 * 60